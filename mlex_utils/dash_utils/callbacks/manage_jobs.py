@@ -1,90 +1,425 @@
+import hashlib
+import json
 import logging
 
-from dash import html, no_update
+from dash import Patch, callback_context, html, no_update
+from plotly.utils import PlotlyJSONEncoder
+from prefect.client.schemas.objects import StateType
+from prefect.exceptions import ObjectNotFound
 
+from mlex_utils.prefect_utils.breaker import is_unavailable_error
 from mlex_utils.prefect_utils.core import (
+    FINAL_STATE_TYPES,
     cancel_flow_run,
     delete_flow_run,
-    get_flow_run_logs,
-    get_flow_run_name,
-    get_flow_run_state,
-    query_flow_runs,
+    flow_run_options,
+    get_flow_run_logs_before,
+    get_job_status,
 )
+from mlex_utils.prefect_utils.watcher import flow_run_watcher
 
 DEV_JOBS = [
     {"label": "❌ DLSIA ABC 03/11/2024 15:38PM", "value": "uid0001"},
     {"label": "🕑 DLSIA XYC 03/11/2024 14:21PM", "value": "uid0002"},
     {"label": "✅ DLSIA CBA 03/11/2024 10:02AM", "value": "uid0003"},
 ]
+DEV_JOB_STATE_TYPES = [StateType.FAILED, StateType.RUNNING, StateType.COMPLETED]
 
 
+# Interval in milliseconds of the job checks while jobs are pending or running, and the
+# longest interval they back off to while all the jobs are in a final state
+CHECK_INTERVAL = 5000
+MAX_CHECK_INTERVAL = 300000
+
+# Number of log lines read per page, and default number of log lines kept by the log
+# viewers, beyond which the oldest pages are dropped
+LOG_PAGE_SIZE = 200
+MAX_LOG_LINES = 5000
+
+# Pages of logs are rendered as preformatted blocks whose rendering is skipped by the
+# browser while they are scrolled out of view
+LOG_PAGE_STYLE = {"margin": 0, "whiteSpace": "pre-wrap", "contentVisibility": "auto"}
+
+# Budget in seconds shared by the Prefect calls of each periodic callback, below the
+# interval of the job checks so that callbacks do not pile up
+CALLBACK_TIMEOUT = 4
+
 logger = logging.getLogger(__name__)
 
 
-def _check_job(prefect_tags, mode):
-    if mode == "dev":
-        data = DEV_JOBS
-    else:
-        try:
-            data = query_flow_runs(tags=prefect_tags)
-        except Exception as e:
-            logger.warning(f"Failed to query flow runs: {e}")
-            data = []
+def _check_job(prefect_tags, interval=None):
+    try:
+        # The watcher polls the jobs at the interval of the job checks
+        data = flow_run_watcher.query_flow_run_summaries(
+            tags=prefect_tags,
+            timeout=CALLBACK_TIMEOUT,
+            poll_interval=(interval or CHECK_INTERVAL) / 1000,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to query flow runs: {e}")
+        # Keep the current options while Prefect is unavailable
+        data = no_update if is_unavailable_error(e) else []
     return data
 
 
-def _check_train_job(prefect_tags, mode):
+def _job_options(flow_runs):
     """
-    This callback populates the train job selector dropdown with job names and ids from Prefect.
-    The list of jobs is filtered by the selected project in the project selector dropdown.
-    This callback displays the current status of the job as part of the job name in the dropdown.
-    In "dev" mode, the dropdown is populated with the sample data above.
+    Returns the options and the state types of the jobs given their summaries, or
+    flow_runs and None if the jobs could not be checked
     """
-    return _check_job(prefect_tags + ["train"], mode)
+    if not isinstance(flow_runs, list):
+        return flow_runs, None
+    return flow_run_options(flow_runs), [flow_run.state_type for flow_run in flow_runs]
 
 
-def _check_dependent_job(job_id, project_name, prefect_tags, mode):
-    if mode == "dev":
-        return DEV_JOBS, no_update
+def _dependent_job_tags(prefect_tags, project_name):
+    # Dependent jobs are also filtered by the project name, if any
+    if prefect_tags is None or not project_name:
+        return prefect_tags
+    return prefect_tags + [project_name]
+
+
+def _dependent_jobs(dependency_flow_run, dependent_flow_runs):
+    """
+    Returns the dependent jobs and value given the dependency job and the summaries of its
+    dependent jobs read by get_job_status, and whether the dependency job is still active.
+    Dependent jobs are only listed once the dependency job has completed.
+    Raises the errors of the reads, except for dependency jobs that no longer exist.
+    """
+    # Dependency jobs that no longer exist have no dependent jobs
+    if dependency_flow_run is None or isinstance(dependency_flow_run, ObjectNotFound):
+        return [], None, False
+    for result in (dependency_flow_run, dependent_flow_runs):
+        if isinstance(result, Exception):
+            raise result
+    if dependency_flow_run.state_type != StateType.COMPLETED:
+        # Dependent jobs may appear once the dependency job completes
+        active = dependency_flow_run.state_type not in FINAL_STATE_TYPES
+        return [], None, active
+    selected_value = None if len(dependent_flow_runs) == 0 else no_update
+    return dependent_flow_runs, selected_value, False
+
+
+def _log_page(logs):
+    return html.Pre(
+        "\n".join(logs),
+        style={**LOG_PAGE_STYLE, "containIntrinsicSize": f"auto {1.5 * len(logs)}em"},
+    )
+
+
+def _format_logs(logs):
+    return [_log_page(logs)] if logs else []
+
+
+def _log_viewer_state(logs_state):
+    return {
+        "max_lines": MAX_LOG_LINES,
+        "page_size": LOG_PAGE_SIZE,
+        "job_id": None,
+        "cursor": None,
+        "pages": [],
+        **(logs_state or {}),
+    }
+
+
+def _update_logs(log_page, logs_job_id, logs_state, cursor):
+    """
+    Returns the logs and the log viewer state after reading log_page (a FlowRunLogPage)
+    from cursor.
+    The pages of the log viewer are replaced if cursor is None, otherwise the logs are
+    appended as a new page with a Patch, which also drops the oldest pages beyond the
+    maximum number of lines. The state holds, for each page, the cursor of the logs
+    before it and its number of lines.
+    """
+    logs_state = _log_viewer_state(logs_state)
+    messages = log_page.messages
+    page = [log_page.earlier_cursor, len(messages)]
+    if cursor is None:
+        logs = _format_logs(messages)
+        pages = [page] if messages else []
+    elif messages:
+        logs = Patch()
+        logs.append(_log_page(messages))
+        pages = logs_state["pages"] + [page]
+        max_lines = logs_state["max_lines"]
+        while len(pages) > 1 and sum(lines for _, lines in pages) > max_lines:
+            pages.pop(0)
+            del logs[0]
     else:
-        if job_id is not None and get_flow_run_state(job_id) == "COMPLETED":
-            job_name = get_flow_run_name(job_id)
-            if job_name is not None:
-                data = query_flow_runs(
-                    flow_run_name=job_name,
-                    tags=prefect_tags.append(project_name),
-                )
-                selected_value = None if len(data) == 0 else no_update
-            return data, selected_value
-        return [], None
+        return no_update, no_update
+    new_logs_state = {
+        **logs_state,
+        "job_id": logs_job_id,
+        "cursor": log_page.cursor,
+        "pages": pages,
+    }
+    return logs, new_logs_state if new_logs_state != logs_state else no_update
+
 
+def _clear_logs_state(logs_state):
+    # Log viewers that do not show logs of a job have no pages
+    new_logs_state = {
+        **_log_viewer_state(logs_state),
+        "job_id": None,
+        "cursor": None,
+        "pages": [],
+    }
+    return new_logs_state if new_logs_state != logs_state else no_update
 
-def _check_inference_job(train_job_id, project_name, prefect_tags, mode):
+
+def _has_earlier_logs(logs_state):
     """
-    This callback populates the inference job selector dropdown with job names and ids from Prefect.
-    The list of jobs is filtered by the selected train job in the train job selector dropdown.
-    The selected value is set to None if the list of jobs is empty.
-    This callback displays the current status of the job as part of the job name in the dropdown.
-    In "dev" mode, the dropdown is populated with the sample data above.
+    Returns True if the log viewer can load the logs before its first page
     """
-    return _check_dependent_job(
-        train_job_id, project_name, prefect_tags + ["inference"], mode
+    logs_state = _log_viewer_state(logs_state)
+    pages = logs_state["pages"]
+    return (
+        len(pages) > 0
+        and pages[0][0] is not None
+        and sum(lines for _, lines in pages) < logs_state["max_lines"]
     )
 
 
-def _get_job_logs(job_id, mode):
+def _load_earlier_logs(logs_state):
     """
-    This callback retrieves the logs of the selected job from Prefect.
-    The logs are displayed in the logs textarea.
-    In "dev" mode, the logs are retrieved from the sample data above.
+    This callback prepends the page of logs before the first page of the log viewer,
+    within the maximum number of lines of the viewer.
+    Returns the logs and the log viewer state.
     """
-    if mode == "dev":
-        return "Sample logs"
+    if not _has_earlier_logs(logs_state):
+        return no_update, no_update
+    logs_state = _log_viewer_state(logs_state)
+    pages = logs_state["pages"]
+    limit = min(
+        logs_state["page_size"],
+        logs_state["max_lines"] - sum(lines for _, lines in pages),
+    )
+    try:
+        messages, earlier_cursor = get_flow_run_logs_before(
+            logs_state["job_id"], pages[0][0], limit, timeout=CALLBACK_TIMEOUT
+        )
+    except Exception as e:
+        if not is_unavailable_error(e):
+            raise
+        logger.warning(f"Failed to read flow run logs: {e}")
+        return no_update, no_update
+    if not messages:
+        # There are no logs before the first page
+        pages = [[None, pages[0][1]]] + pages[1:]
+        return no_update, {**logs_state, "pages": pages}
+    logs = Patch()
+    logs.prepend(_log_page(messages))
+    pages = [[earlier_cursor, len(messages)]] + pages
+    return logs, {**logs_state, "pages": pages}
+
+
+def _triggered_props():
+    """
+    Returns the names of the properties that triggered the current callback, or None
+    if it is the initial call
+    """
+    prop_ids = callback_context.triggered_prop_ids
+    if not prop_ids:
+        return None
+    return {prop_id.rsplit(".", 1)[-1] for prop_id in prop_ids}
+
+
+def _next_check_interval(interval, job_state_types, active=False):
+    """
+    Returns the interval of the next job check given the current interval and the state
+    types of the jobs of each list, or None for the lists that could not be checked:
+    CHECK_INTERVAL while any job is not in a final state (or active is True), otherwise
+    twice the current interval up to MAX_CHECK_INTERVAL.
+    Returns no_update if the interval does not change or no job could be checked.
+    """
+    job_state_types = [
+        state_types for state_types in job_state_types if state_types is not None
+    ]
+    if not job_state_types and not active:
+        return no_update
+    if (
+        active
+        or interval is None
+        or any(
+            state_type not in FINAL_STATE_TYPES
+            for state_types in job_state_types
+            for state_type in state_types
+        )
+    ):
+        next_interval = CHECK_INTERVAL
     else:
-        logs = get_flow_run_logs(job_id)
-        return [item for pair in zip(logs, [html.Br()] * len(logs)) for item in pair][
-            :-1
-        ]
+        next_interval = min(2 * interval, MAX_CHECK_INTERVAL)
+    return no_update if next_interval == interval else next_interval
+
+
+def _content_hash(value):
+    # Hash of the JSON payload of a callback output, components included
+    payload = json.dumps(value, cls=PlotlyJSONEncoder).encode()
+    return hashlib.md5(payload, usedforsecurity=False).hexdigest()
+
+
+def _skip_unchanged(hashes, **outputs):
+    """
+    Replaces the outputs whose content hash is the same as in hashes, which holds the
+    hashes of the outputs last sent to the browser, by no_update.
+    Returns the outputs and the updated hashes, or no_update if no output changed.
+    """
+    new_hashes = dict(hashes or {})
+    for name, value in outputs.items():
+        if value is no_update:
+            continue
+        if isinstance(value, Patch):
+            # The patched content in the browser is not known, so it is not hashed
+            new_hashes.pop(name, None)
+            continue
+        value_hash = _content_hash(value)
+        if new_hashes.get(name) == value_hash:
+            outputs[name] = no_update
+        else:
+            new_hashes[name] = value_hash
+    if new_hashes == (hashes or {}):
+        new_hashes = no_update
+    return outputs, new_hashes
+
+
+def _check_jobs(
+    job_tags,
+    dependent_tags,
+    dependency_job_id,
+    project_name,
+    logs_job_id,
+    mode,
+    triggered_props=None,
+    interval=None,
+    hashes=None,
+    logs_open=True,
+    logs_state=None,
+    match_dependents_by_name=True,
+):
+    """
+    This callback checks all the jobs of a job manager in a single pass:
+    - The job selector options, with the jobs filtered by job_tags.
+    - The dependent job selector options and value, with the jobs filtered by dependent_tags
+      and project_name that were scheduled with depends_on set to dependency_job_id (or,
+      without such jobs and if match_dependents_by_name is True, whose name contains the
+      name of that job), once that job has completed.
+    - The logs of logs_job_id, displayed in the log viewer while logs_open is True, and
+      the log viewer state. The last page of logs is read when the advanced options are
+      opened, and new logs are then appended from the cursor in logs_state.
+    - The interval of the next check, given the current interval (see _next_check_interval).
+      The shared flow run watcher polls the job list at that interval.
+    - The content hashes of the job options and logs last sent to the browser, given the
+      current hashes. Outputs that did not change are returned as no_update, except for
+      the logs read when the advanced options are opened.
+    The dependency job, its dependent jobs and the logs are read concurrently from Prefect,
+    and the job list is served by the shared flow run watcher.
+    Interval ticks (and the initial call) check everything, a change of the dependency job
+    only checks the dependent jobs, and opening the advanced options only checks the logs.
+    Outputs that are not checked, or that have no tags, are returned as no_update.
+    In "dev" mode, the outputs are populated with the sample data above.
+    Returns the job options, dependent job options, dependent job value, logs, interval,
+    hashes and log viewer state.
+    """
+    check_all = triggered_props is None or "n_intervals" in triggered_props
+    check_jobs = job_tags is not None and check_all
+    check_dependent = dependent_tags is not None and (
+        check_all or "value" in triggered_props
+    )
+    logs_opened = triggered_props is None or bool(
+        {"is_open", "opened"} & triggered_props
+    )
+    check_logs = logs_open and (check_all or logs_opened)
+    cursor = None
+    if not logs_opened and logs_state and logs_state.get("job_id") == logs_job_id:
+        cursor = logs_state["cursor"]
+    new_logs_state = no_update
+    dependency_active = False
+
+    def _outputs():
+        next_interval = no_update
+        if check_all:
+            next_interval = _next_check_interval(
+                interval, [job_state_types, dependent_state_types], dependency_active
+            )
+            if check_jobs and mode != "dev" and next_interval is not no_update:
+                # The job list is polled at the interval of the next check
+                flow_run_watcher.subscribe(
+                    tags=job_tags, poll_interval=next_interval / 1000
+                )
+        sent_hashes = hashes
+        if logs_opened and hashes:
+            # Earlier logs may have been prepended to the viewer since the logs were
+            # last sent, so the full logs read when it is opened are always sent
+            sent_hashes = {name: h for name, h in hashes.items() if name != "logs"}
+        outputs, new_hashes = _skip_unchanged(
+            sent_hashes, job=job_options, dependent=dependent_options, logs=logs
+        )
+        # The value only needs to be reset when the dependent job options change
+        value = dependent_value if outputs["dependent"] is not no_update else no_update
+        return (
+            outputs["job"],
+            outputs["dependent"],
+            value,
+            outputs["logs"],
+            next_interval,
+            new_hashes,
+            new_logs_state,
+        )
+
+    job_options, dependent_options, dependent_value, logs = (no_update,) * 4
+    job_state_types = dependent_state_types = None
+    if mode == "dev":
+        if check_jobs:
+            job_options, job_state_types = DEV_JOBS, DEV_JOB_STATE_TYPES
+        if check_dependent:
+            dependent_options, dependent_state_types = DEV_JOBS, DEV_JOB_STATE_TYPES
+        if check_logs:
+            logs = "Sample logs"
+            new_logs_state = _clear_logs_state(logs_state)
+        return _outputs()
+
+    if check_jobs:
+        job_options, job_state_types = _job_options(_check_job(job_tags, interval))
+    if check_dependent and dependency_job_id is None:
+        dependent_options, dependent_state_types, dependent_value = [], [], None
+    if check_logs and logs_job_id is None:
+        logs = "No logs available"
+        new_logs_state = _clear_logs_state(logs_state)
+    dependency_job_id = dependency_job_id if check_dependent else None
+    logs_job_id = logs_job_id if check_logs else None
+    if dependency_job_id is None and logs_job_id is None:
+        return _outputs()
+
+    try:
+        # The reads and the dependent job query are sent together within a single budget
+        dependency_flow_run, dependent_flow_runs, job_logs = get_job_status(
+            dependency_job_id,
+            _dependent_job_tags(dependent_tags, project_name),
+            logs_job_id,
+            cursor,
+            _log_viewer_state(logs_state)["page_size"],
+            match_dependents_by_name,
+            timeout=CALLBACK_TIMEOUT,
+        )
+        if dependency_job_id is not None:
+            dependent_flow_runs, dependent_value, dependency_active = _dependent_jobs(
+                dependency_flow_run, dependent_flow_runs
+            )
+            dependent_options, dependent_state_types = _job_options(dependent_flow_runs)
+    except Exception as e:
+        if not is_unavailable_error(e):
+            raise
+        logger.warning(f"Failed to check dependent jobs: {e}")
+        dependent_options, dependent_value = no_update, no_update
+        return _outputs()
+
+    if isinstance(job_logs, Exception):
+        if not is_unavailable_error(job_logs):
+            raise job_logs
+        logger.warning(f"Failed to read flow run logs: {job_logs}")
+    elif job_logs is not None:
+        logs, new_logs_state = _update_logs(job_logs, logs_job_id, logs_state, cursor)
+    return _outputs()
 
 
 def _cancel_job(job_id, mode):
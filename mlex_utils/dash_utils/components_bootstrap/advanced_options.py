@@ -3,6 +3,8 @@ import uuid
 import dash_bootstrap_components as dbc
 from dash import MATCH, Input, Output, State, callback, dcc
 
+from mlex_utils.dash_utils.components_bootstrap.log_viewer import DbcLogViewerAIO
+
 
 class DbcAdvancedOptionsAIO(dbc.Modal):
 
@@ -88,12 +90,15 @@ class DbcAdvancedOptionsAIO(dbc.Modal):
         of a parent `html.Div` with a button to cancel, delete, and advance a job.
         - `cancel_button_props` - A dictionary of properties passed into the Button component for the cancel button.
         - `delete_button_props` - A dictionary of properties passed into the Button component for the delete button.
-        - `logs_area_props` - A dictionary of properties passed into the Textarea component for the logs area.
+        - `logs_area_props` - A dictionary of properties passed into the log viewer of the logs area, e.g. `max_lines`.
         - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
         """
         if aio_id is None:
             aio_id = str(uuid.uuid4())
 
+        if logs_area_props is None:
+            logs_area_props = {}
+
         cancel_button_props, delete_button_props = self._update_props(
             cancel_button_props, delete_button_props
         )
@@ -102,7 +107,10 @@ class DbcAdvancedOptionsAIO(dbc.Modal):
             id=self.ids.advanced_options_modal(aio_id),
             children=[
                 dbc.ModalHeader("Advanced Options"),
-                dbc.ModalBody(id=self.ids.logs_area(aio_id)),
+                dbc.ModalBody(
+                    DbcLogViewerAIO(aio_id=aio_id, **logs_area_props),
+                    id=self.ids.logs_area(aio_id),
+                ),
                 dbc.ModalFooter(
                     dbc.Accordion(
                         dbc.AccordionItem(
@@ -15,11 +15,11 @@ from dash import (
 from dash_iconify import DashIconify
 
 from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    CHECK_INTERVAL,
     _cancel_job,
-    _check_inference_job,
-    _check_train_job,
+    _check_jobs,
     _delete_job,
-    _get_job_logs,
+    _triggered_props,
 )
 from mlex_utils.dash_utils.components_bootstrap.advanced_options import (
     DbcAdvancedOptionsAIO,
@@ -103,6 +103,12 @@ class DbcJobManagerAIO(html.Div):
             "aio_id": aio_id,
         }
 
+        content_hashes = lambda aio_id: {  # noqa: E731
+            "component": "DbcJobManagerAIO",
+            "subcomponent": "content-hashes",
+            "aio_id": aio_id,
+        }
+
         notifications_container = lambda aio_id: {  # noqa: E731
             "component": "DbcJobManagerAIO",
             "subcomponent": "notifications-container",
@@ -151,12 +157,15 @@ class DbcJobManagerAIO(html.Div):
         show_training_stats_button_props=None,
         modal_props=None,
         aio_id=None,
+        match_dependents_by_name=True,
     ):
         """
         DbcJobManagerAIO is an All-in-One component that is composed
         of a parent `html.Div` with a button to train and infer a model.
         - `model_list` - A list of models
         - `prefect_tags` - A list of tags used to filter Prefect flow runs.
+            Inference flow runs are listed under the selected train job if they were scheduled with
+            `depends_on` set to its id, or else if their name contains the name of the train job.
         - `mode` - The mode of the component. If "dev", the component will display sample data.
         - `train_button_props` - A dictionary of properties passed into the Button component for the train button.
         - `inference_button_props` - A dictionary of properties passed into the Button component for the inference button.
@@ -164,6 +173,8 @@ class DbcJobManagerAIO(html.Div):
             show training stats button.
         - `modal_props` - A dictionary of properties passed into the Modal component for the advanced options modal.
         - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
+        - `match_dependents_by_name` - If False, inference flow runs are only listed if they were scheduled with
+            `depends_on`, and the name query is not sent.
         """
         if aio_id is None:
             aio_id = str(uuid.uuid4())
@@ -184,6 +195,7 @@ class DbcJobManagerAIO(html.Div):
         self._aio_id = aio_id
         self._prefect_tags = prefect_tags
         self._mode = mode
+        self._match_dependents_by_name = match_dependents_by_name
 
         super().__init__(
             [
@@ -319,12 +331,13 @@ class DbcJobManagerAIO(html.Div):
                 html.Div(id=self.ids.notifications_container(aio_id)),
                 dcc.Interval(
                     id=self.ids.check_job(aio_id),
-                    interval=5000,
+                    interval=CHECK_INTERVAL,
                 ),
                 dcc.Store(
                     id=self.ids.project_name_id(aio_id),
                     data="",
                 ),
+                dcc.Store(id=self.ids.content_hashes(aio_id)),
             ]
         )
 
@@ -394,24 +407,107 @@ class DbcJobManagerAIO(html.Div):
 
         @callback(
             Output(self.ids.train_dropdown(self._aio_id), "options"),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-        )
-        def check_train_job(n_intervals):
-            return _check_train_job(self._prefect_tags, self._mode)
-
-        @callback(
             Output(self.ids.inference_dropdown(self._aio_id), "options"),
             Output(self.ids.inference_dropdown(self._aio_id), "value"),
+            Output(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcLogViewerAIO",
+                    "subcomponent": "log-text",
+                },
+                "children",
+            ),
+            Output(self.ids.check_job(self._aio_id), "interval"),
+            Output(self.ids.content_hashes(self._aio_id), "data"),
+            Output(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcLogViewerAIO",
+                    "subcomponent": "log-state",
+                },
+                "data",
+            ),
             Input(self.ids.check_job(self._aio_id), "n_intervals"),
             Input(self.ids.train_dropdown(self._aio_id), "value"),
+            Input(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcAdvancedOptionsAIO",
+                    "subcomponent": "advanced-options-modal",
+                },
+                "is_open",
+            ),
             State(self.ids.project_name_id(self._aio_id), "data"),
-            prevent_initial_call=True,
+            State(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcAdvancedOptionsAIO",
+                    "subcomponent": "job-id",
+                },
+                "data",
+            ),
+            State(self.ids.check_job(self._aio_id), "interval"),
+            State(self.ids.content_hashes(self._aio_id), "data"),
+            State(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcLogViewerAIO",
+                    "subcomponent": "log-state",
+                },
+                "data",
+            ),
         )
-        def check_inferece_job(n_intervals, train_job_id, project_name):
-            return _check_inference_job(
-                train_job_id, project_name, self._prefect_tags, self._mode
+        def check_jobs(
+            n_intervals,
+            train_job_id,
+            is_open,
+            project_name,
+            job_id,
+            interval,
+            hashes,
+            logs_state,
+        ):
+            return _check_jobs(
+                self._prefect_tags + ["train"],
+                self._prefect_tags + ["inference"],
+                train_job_id,
+                project_name,
+                job_id,
+                self._mode,
+                _triggered_props(),
+                interval,
+                hashes,
+                is_open,
+                logs_state,
+                self._match_dependents_by_name,
             )
 
+        @callback(
+            Output(self.ids.check_job(self._aio_id), "interval", allow_duplicate=True),
+            Input(self.ids.train_button(self._aio_id), "n_clicks"),
+            Input(self.ids.inference_button(self._aio_id), "n_clicks"),
+            Input(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcAdvancedOptionsAIO",
+                    "subcomponent": "warning-confirm-cancel",
+                },
+                "n_clicks",
+            ),
+            Input(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DbcAdvancedOptionsAIO",
+                    "subcomponent": "warning-confirm-delete",
+                },
+                "n_clicks",
+            ),
+            prevent_initial_call=True,
+        )
+        def reset_check_interval(*n_clicks):
+            # Jobs are checked often again after user actions
+            return CHECK_INTERVAL
+
         @callback(
             Output(
                 {
@@ -485,36 +581,3 @@ class DbcJobManagerAIO(html.Div):
             if job_id == train_job_id:
                 return None, no_update, False
             return no_update, None, False
-
-        @callback(
-            Output(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DbcAdvancedOptionsAIO",
-                    "subcomponent": "logs-area",
-                },
-                "children",
-            ),
-            Input(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DbcAdvancedOptionsAIO",
-                    "subcomponent": "advanced-options-modal",
-                },
-                "is_open",
-            ),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-            State(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DbcAdvancedOptionsAIO",
-                    "subcomponent": "job-id",
-                },
-                "data",
-            ),
-            prevent_initial_call=True,
-        )
-        def get_logs(is_open, n_intervals, job_id):
-            if job_id is None:
-                return "No logs available"
-            return _get_job_logs(job_id, self._mode)
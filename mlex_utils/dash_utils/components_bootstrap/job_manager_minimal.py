@@ -5,11 +5,11 @@ from dash import MATCH, Input, Output, State, callback, dcc, html
 from dash_iconify import DashIconify
 
 from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    CHECK_INTERVAL,
     _cancel_job,
-    _check_dependent_job,
-    _check_job,
+    _check_jobs,
     _delete_job,
-    _get_job_logs,
+    _triggered_props,
 )
 from mlex_utils.dash_utils.components_bootstrap.advanced_options import (
     DbcAdvancedOptionsAIO,
@@ -69,6 +69,12 @@ class DbcJobManagerMinimalAIO(html.Div):
             "aio_id": aio_id,
         }
 
+        content_hashes = lambda aio_id: {  # noqa: E731
+            "component": "DbcJobManagerAIO",
+            "subcomponent": "content-hashes",
+            "aio_id": aio_id,
+        }
+
         notifications_container = lambda aio_id: {  # noqa: E731
             "component": "DbcJobManagerAIO",
             "subcomponent": "notifications-container",
@@ -104,6 +110,7 @@ class DbcJobManagerMinimalAIO(html.Div):
         modal_props=None,
         aio_id=None,
         dependency_id=None,
+        match_dependents_by_name=True,
     ):
         """
         DbcJobManagerAIO is an All-in-One component that is composed
@@ -115,7 +122,10 @@ class DbcJobManagerMinimalAIO(html.Div):
         - `modal_props` - A dictionary of properties passed into the Modal component for the advanced options modal.
         - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
         - `dependency_id` - Check list of jobs that are dependent on the completion of the job of this component id
-                            (dropdown).
+                            (dropdown), i.e. that were scheduled with `depends_on` set to its value, or else
+                            whose name contains the name of that job.
+        - `match_dependents_by_name` - If False, dependent jobs are only listed if they were scheduled with
+                                       `depends_on`, and the name query is not sent.
         """
         if aio_id is None:
             aio_id = str(uuid.uuid4())
@@ -129,6 +139,7 @@ class DbcJobManagerMinimalAIO(html.Div):
         self._prefect_tags = prefect_tags
         self._mode = mode
         self._dependency_id = dependency_id
+        self._match_dependents_by_name = match_dependents_by_name
 
         super().__init__(
             [
@@ -201,12 +212,13 @@ class DbcJobManagerMinimalAIO(html.Div):
                 html.Div(id=self.ids.notifications_container(aio_id)),
                 dcc.Interval(
                     id=self.ids.check_job(aio_id),
-                    interval=5000,
+                    interval=CHECK_INTERVAL,
                 ),
                 dcc.Store(
                     id=self.ids.project_name_id(aio_id),
                     data="",
                 ),
+                dcc.Store(id=self.ids.content_hashes(aio_id)),
             ]
         )
 
@@ -324,61 +336,176 @@ class DbcJobManagerMinimalAIO(html.Div):
             return None, False
 
         @callback(
-            Output(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DbcAdvancedOptionsAIO",
-                    "subcomponent": "logs-area",
-                },
-                "children",
-            ),
+            Output(self.ids.check_job(self._aio_id), "interval", allow_duplicate=True),
+            Input(self.ids.run_button(self._aio_id), "n_clicks"),
             Input(
                 {
                     "aio_id": self._aio_id,
                     "component": "DbcAdvancedOptionsAIO",
-                    "subcomponent": "advanced-options-modal",
+                    "subcomponent": "warning-confirm-cancel",
                 },
-                "is_open",
+                "n_clicks",
             ),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-            State(
+            Input(
                 {
                     "aio_id": self._aio_id,
                     "component": "DbcAdvancedOptionsAIO",
-                    "subcomponent": "job-id",
+                    "subcomponent": "warning-confirm-delete",
                 },
-                "data",
+                "n_clicks",
             ),
             prevent_initial_call=True,
         )
-        def get_logs(is_open, n_intervals, job_id):
-            if job_id is None:
-                return "No logs available"
-            return _get_job_logs(job_id, self._mode)
+        def reset_check_interval(*n_clicks):
+            # Jobs are checked often again after user actions
+            return CHECK_INTERVAL
 
-        if self._dependency_id is not None:
+        if self._dependency_id:
 
             @callback(
                 Output(
                     self.ids.run_dropdown(self._aio_id), "options", allow_duplicate=True
                 ),
                 Output(self.ids.run_dropdown(self._aio_id), "value"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcLogViewerAIO",
+                        "subcomponent": "log-text",
+                    },
+                    "children",
+                ),
+                Output(self.ids.check_job(self._aio_id), "interval"),
+                Output(self.ids.content_hashes(self._aio_id), "data"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
                 Input(self.ids.check_job(self._aio_id), "n_intervals"),
                 Input(self._dependency_id, "value"),
+                Input(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcAdvancedOptionsAIO",
+                        "subcomponent": "advanced-options-modal",
+                    },
+                    "is_open",
+                ),
                 State(self.ids.project_name_id(self._aio_id), "data"),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcAdvancedOptionsAIO",
+                        "subcomponent": "job-id",
+                    },
+                    "data",
+                ),
+                State(self.ids.check_job(self._aio_id), "interval"),
+                State(self.ids.content_hashes(self._aio_id), "data"),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
                 prevent_initial_call=True,
             )
-            def check_dependent_job(n_intervals, dependent_job_id, project_name):
-                jobs = _check_dependent_job(
-                    dependent_job_id, project_name, self._prefect_tags, self._mode
+            def check_dependent_job(
+                n_intervals,
+                dependent_job_id,
+                is_open,
+                project_name,
+                job_id,
+                interval,
+                hashes,
+                logs_state,
+            ):
+                _, *outputs = _check_jobs(
+                    None,
+                    self._prefect_tags,
+                    dependent_job_id,
+                    project_name,
+                    job_id,
+                    self._mode,
+                    _triggered_props(),
+                    interval,
+                    hashes,
+                    is_open,
+                    logs_state,
+                    self._match_dependents_by_name,
                 )
-                return jobs
+                return outputs
 
         else:
 
             @callback(
                 Output(self.ids.run_dropdown(self._aio_id), "options"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcLogViewerAIO",
+                        "subcomponent": "log-text",
+                    },
+                    "children",
+                ),
+                Output(self.ids.check_job(self._aio_id), "interval"),
+                Output(self.ids.content_hashes(self._aio_id), "data"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
                 Input(self.ids.check_job(self._aio_id), "n_intervals"),
+                Input(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcAdvancedOptionsAIO",
+                        "subcomponent": "advanced-options-modal",
+                    },
+                    "is_open",
+                ),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcAdvancedOptionsAIO",
+                        "subcomponent": "job-id",
+                    },
+                    "data",
+                ),
+                State(self.ids.check_job(self._aio_id), "interval"),
+                State(self.ids.content_hashes(self._aio_id), "data"),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DbcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
             )
-            def check_run_job(n_intervals):
-                return _check_job(self._prefect_tags, self._mode)
+            def check_run_job(
+                n_intervals, is_open, job_id, interval, hashes, logs_state
+            ):
+                jobs, _, _, *outputs = _check_jobs(
+                    self._prefect_tags,
+                    None,
+                    None,
+                    None,
+                    job_id,
+                    self._mode,
+                    _triggered_props(),
+                    interval,
+                    hashes,
+                    is_open,
+                    logs_state,
+                )
+                return jobs, *outputs
@@ -0,0 +1,115 @@
+import uuid
+
+import dash_bootstrap_components as dbc
+from dash import MATCH, Input, Output, State, callback, dcc, html
+
+from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    LOG_PAGE_SIZE,
+    MAX_LOG_LINES,
+    _has_earlier_logs,
+    _load_earlier_logs,
+)
+
+
+class DbcLogViewerAIO(html.Div):
+
+    class ids:
+
+        load_earlier_button = lambda aio_id: {  # noqa: E731
+            "component": "DbcLogViewerAIO",
+            "subcomponent": "load-earlier-button",
+            "aio_id": aio_id,
+        }
+
+        log_text = lambda aio_id: {  # noqa: E731
+            "component": "DbcLogViewerAIO",
+            "subcomponent": "log-text",
+            "aio_id": aio_id,
+        }
+
+        log_state = lambda aio_id: {  # noqa: E731
+            "component": "DbcLogViewerAIO",
+            "subcomponent": "log-state",
+            "aio_id": aio_id,
+        }
+
+    ids = ids
+
+    def __init__(
+        self,
+        max_lines=MAX_LOG_LINES,
+        page_size=LOG_PAGE_SIZE,
+        load_earlier_button_props=None,
+        log_text_style=None,
+        aio_id=None,
+    ):
+        """
+        DbcLogViewerAIO is an All-in-One component that is composed
+        of a parent `html.Div` with the logs of a job and a button to load earlier logs.
+        Logs are displayed as pages of preformatted text, and pages that are scrolled out
+        of view are not rendered by the browser.
+        - `max_lines` - The maximum number of log lines kept in the browser. The oldest pages are dropped
+            when new logs are appended beyond it.
+        - `page_size` - The number of log lines read per page.
+        - `load_earlier_button_props` - A dictionary of properties passed into the Button component for the
+            load earlier button.
+        - `log_text_style` - A dictionary of styles applied to the scrollable logs.
+        - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
+        """
+        if aio_id is None:
+            aio_id = str(uuid.uuid4())
+
+        if load_earlier_button_props is None:
+            load_earlier_button_props = {"color": "link", "size": "sm"}
+        if log_text_style is None:
+            log_text_style = {}
+
+        self._aio_id = aio_id
+
+        super().__init__(
+            [
+                dbc.Button(
+                    "Load earlier",
+                    id=self.ids.load_earlier_button(aio_id),
+                    disabled=True,
+                    **load_earlier_button_props,
+                ),
+                html.Div(
+                    id=self.ids.log_text(aio_id),
+                    style={
+                        "maxHeight": "60vh",
+                        "overflowY": "auto",
+                        "fontFamily": "monospace",
+                        "fontSize": "0.8rem",
+                        "lineHeight": 1.5,
+                        **log_text_style,
+                    },
+                ),
+                dcc.Store(
+                    id=self.ids.log_state(aio_id),
+                    data={"max_lines": max_lines, "page_size": page_size},
+                ),
+            ]
+        )
+
+        self.register_callbacks()
+
+    @staticmethod
+    @callback(
+        Output(ids.load_earlier_button(MATCH), "disabled"),
+        Input(ids.log_state(MATCH), "data"),
+    )
+    def disable_load_earlier(logs_state):
+        return not _has_earlier_logs(logs_state)
+
+    def register_callbacks(self):
+
+        @callback(
+            Output(self.ids.log_text(self._aio_id), "children", allow_duplicate=True),
+            Output(self.ids.log_state(self._aio_id), "data", allow_duplicate=True),
+            Input(self.ids.load_earlier_button(self._aio_id), "n_clicks"),
+            State(self.ids.log_state(self._aio_id), "data"),
+            prevent_initial_call=True,
+        )
+        def load_earlier_logs(n_clicks, logs_state):
+            return _load_earlier_logs(logs_state)
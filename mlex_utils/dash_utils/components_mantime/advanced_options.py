@@ -4,6 +4,8 @@ import dash_mantine_components as dmc
 from dash import MATCH, Input, Output, State, callback, dcc
 from dash_iconify import DashIconify
 
+from mlex_utils.dash_utils.components_mantime.log_viewer import DmcLogViewerAIO
+
 
 class DmcAdvancedOptionsAIO(dmc.Modal):
 
@@ -89,12 +91,15 @@ class DmcAdvancedOptionsAIO(dmc.Modal):
         of a parent `html.Div` with a button to cancel, delete, and advance a job.
         - `cancel_button_props` - A dictionary of properties passed into the Button component for the cancel button.
         - `delete_button_props` - A dictionary of properties passed into the Button component for the delete button.
-        - `logs_area_props` - A dictionary of properties passed into the Textarea component for the logs area.
+        - `logs_area_props` - A dictionary of properties passed into the log viewer of the logs area, e.g. `max_lines`.
         - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
         """
         if aio_id is None:
             aio_id = str(uuid.uuid4())
 
+        if logs_area_props is None:
+            logs_area_props = {}
+
         cancel_button_props = self._update_button_props(cancel_button_props)
         delete_button_props = self._update_button_props(delete_button_props)
 
@@ -103,16 +108,10 @@ class DmcAdvancedOptionsAIO(dmc.Modal):
             id=self.ids.advanced_options_modal(aio_id),
             opened=False,
             children=[
-                dmc.ScrollArea(
-                    children=dmc.Paper(
-                        [
-                            dmc.Text(
-                                "These are the logs...",
-                                id=self.ids.logs_area(aio_id),
-                            ),
-                        ],
-                        style={"width": "100%", "height": 200, "margin-bottom": "10px"},
-                    ),
+                dmc.Paper(
+                    DmcLogViewerAIO(aio_id=aio_id, **logs_area_props),
+                    id=self.ids.logs_area(aio_id),
+                    style={"width": "100%", "margin-bottom": "10px"},
                 ),
                 dmc.Accordion(
                     children=[
@@ -15,11 +15,11 @@ from dash import (
 from dash_iconify import DashIconify
 
 from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    CHECK_INTERVAL,
     _cancel_job,
-    _check_inference_job,
-    _check_train_job,
+    _check_jobs,
     _delete_job,
-    _get_job_logs,
+    _triggered_props,
 )
 from mlex_utils.dash_utils.components_mantime.advanced_options import (
     DmcAdvancedOptionsAIO,
@@ -124,6 +124,12 @@ class DmcJobManagerAIO(html.Div):
             "aio_id": aio_id,
         }
 
+        content_hashes = lambda aio_id: {  # noqa: E731
+            "component": "DmcJobManagerAIO",
+            "subcomponent": "content-hashes",
+            "aio_id": aio_id,
+        }
+
         notifications_container = lambda aio_id: {  # noqa: E731
             "component": "DmcJobManagerAIO",
             "subcomponent": "notifications-container",
@@ -172,12 +178,15 @@ class DmcJobManagerAIO(html.Div):
         show_training_stats_button_props=None,
         modal_props=None,
         aio_id=None,
+        match_dependents_by_name=True,
     ):
         """
         DmcJobManagerAIO is an All-in-One component that is composed
         of a parent `html.Div` with a button to train and infer a model.
         - `model_list` - A list of models
         - `prefect_tags` - A list of tags used to filter Prefect flow runs.
+            Inference flow runs are listed under the selected train job if they were scheduled with
+            `depends_on` set to its id, or else if their name contains the name of the train job.
         - `mode` - The mode of the component. If "dev", the component will display sample data.
         - `train_button_props` - A dictionary of properties passed into the Button component for the train button.
         - `inference_button_props` - A dictionary of properties passed into the Button component for the inference button.
@@ -185,6 +194,8 @@ class DmcJobManagerAIO(html.Div):
             show training stats button.
         - `modal_props` - A dictionary of properties passed into the Modal component for the advanced options modal.
         - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
+        - `match_dependents_by_name` - If False, inference flow runs are only listed if they were scheduled with
+            `depends_on`, and the name query is not sent.
         """
         if aio_id is None:
             aio_id = str(uuid.uuid4())
@@ -213,6 +224,7 @@ class DmcJobManagerAIO(html.Div):
         self._aio_id = aio_id
         self._prefect_tags = prefect_tags
         self._mode = mode
+        self._match_dependents_by_name = match_dependents_by_name
 
         super().__init__(
             [
@@ -320,12 +332,13 @@ class DmcJobManagerAIO(html.Div):
                 html.Div(id=self.ids.notifications_container(aio_id)),
                 dcc.Interval(
                     id=self.ids.check_job(aio_id),
-                    interval=5000,
+                    interval=CHECK_INTERVAL,
                 ),
                 dcc.Store(
                     id=self.ids.project_name_id(aio_id),
                     data="",
                 ),
+                dcc.Store(id=self.ids.content_hashes(aio_id)),
             ]
         )
 
@@ -395,24 +408,107 @@ class DmcJobManagerAIO(html.Div):
 
         @callback(
             Output(self.ids.train_dropdown(self._aio_id), "data"),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-        )
-        def check_train_job(n_intervals):
-            return _check_train_job(self._prefect_tags, self._mode)
-
-        @callback(
             Output(self.ids.inference_dropdown(self._aio_id), "data"),
             Output(self.ids.inference_dropdown(self._aio_id), "value"),
+            Output(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcLogViewerAIO",
+                    "subcomponent": "log-text",
+                },
+                "children",
+            ),
+            Output(self.ids.check_job(self._aio_id), "interval"),
+            Output(self.ids.content_hashes(self._aio_id), "data"),
+            Output(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcLogViewerAIO",
+                    "subcomponent": "log-state",
+                },
+                "data",
+            ),
             Input(self.ids.check_job(self._aio_id), "n_intervals"),
             Input(self.ids.train_dropdown(self._aio_id), "value"),
+            Input(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcAdvancedOptionsAIO",
+                    "subcomponent": "advanced-options-modal",
+                },
+                "opened",
+            ),
             State(self.ids.project_name_id(self._aio_id), "data"),
-            prevent_initial_call=True,
+            State(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcAdvancedOptionsAIO",
+                    "subcomponent": "job-id",
+                },
+                "data",
+            ),
+            State(self.ids.check_job(self._aio_id), "interval"),
+            State(self.ids.content_hashes(self._aio_id), "data"),
+            State(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcLogViewerAIO",
+                    "subcomponent": "log-state",
+                },
+                "data",
+            ),
         )
-        def check_inference_job(n_intervals, train_job_id, project_name):
-            return _check_inference_job(
-                train_job_id, project_name, self._prefect_tags, self._mode
+        def check_jobs(
+            n_intervals,
+            train_job_id,
+            opened,
+            project_name,
+            job_id,
+            interval,
+            hashes,
+            logs_state,
+        ):
+            return _check_jobs(
+                self._prefect_tags + ["train"],
+                self._prefect_tags + ["inference"],
+                train_job_id,
+                project_name,
+                job_id,
+                self._mode,
+                _triggered_props(),
+                interval,
+                hashes,
+                opened,
+                logs_state,
+                self._match_dependents_by_name,
             )
 
+        @callback(
+            Output(self.ids.check_job(self._aio_id), "interval", allow_duplicate=True),
+            Input(self.ids.train_button(self._aio_id), "n_clicks"),
+            Input(self.ids.inference_button(self._aio_id), "n_clicks"),
+            Input(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcAdvancedOptionsAIO",
+                    "subcomponent": "warning-confirm-cancel",
+                },
+                "n_clicks",
+            ),
+            Input(
+                {
+                    "aio_id": self._aio_id,
+                    "component": "DmcAdvancedOptionsAIO",
+                    "subcomponent": "warning-confirm-delete",
+                },
+                "n_clicks",
+            ),
+            prevent_initial_call=True,
+        )
+        def reset_check_interval(*n_clicks):
+            # Jobs are checked often again after user actions
+            return CHECK_INTERVAL
+
         @callback(
             Output(
                 {
@@ -486,36 +582,3 @@ class DmcJobManagerAIO(html.Div):
             if job_id == train_job_id:
                 return None, no_update, False
             return no_update, None, False
-
-        @callback(
-            Output(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DmcAdvancedOptionsAIO",
-                    "subcomponent": "logs-area",
-                },
-                "children",
-            ),
-            Input(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DmcAdvancedOptionsAIO",
-                    "subcomponent": "advanced-options-modal",
-                },
-                "opened",
-            ),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-            State(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DmcAdvancedOptionsAIO",
-                    "subcomponent": "job-id",
-                },
-                "data",
-            ),
-            prevent_initial_call=True,
-        )
-        def get_logs(is_open, n_intervals, job_id):
-            if job_id is None:
-                return "No logs available"
-            return _get_job_logs(job_id, self._mode)
@@ -5,11 +5,11 @@ from dash import MATCH, Input, Output, State, callback, dcc, html
 from dash_iconify import DashIconify
 
 from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    CHECK_INTERVAL,
     _cancel_job,
-    _check_inference_job,
-    _check_train_job,
+    _check_jobs,
     _delete_job,
-    _get_job_logs,
+    _triggered_props,
 )
 from mlex_utils.dash_utils.components_mantime.advanced_options import (
     DmcAdvancedOptionsAIO,
@@ -78,6 +78,12 @@ class DmcJobManagerMinimalAIO(html.Div):
             "aio_id": aio_id,
         }
 
+        content_hashes = lambda aio_id: {  # noqa: E731
+            "component": "DmcJobManagerAIO",
+            "subcomponent": "content-hashes",
+            "aio_id": aio_id,
+        }
+
         notifications_container = lambda aio_id: {  # noqa: E731
             "component": "DmcJobManagerAIO",
             "subcomponent": "notifications-container",
@@ -113,6 +119,7 @@ class DmcJobManagerMinimalAIO(html.Div):
         modal_props=None,
         aio_id=None,
         dependency=None,
+        match_dependents_by_name=True,
     ):
         """
         DmcJobManagerAIO is an All-in-One component that is composed
@@ -123,7 +130,10 @@ class DmcJobManagerMinimalAIO(html.Div):
         - `run_button_props` - A dictionary of properties passed into the Button component for the run button.
         - `modal_props` - A dictionary of properties passed into the Modal component for the advanced options modal.
         - `aio_id` - The All-in-One component ID used to generate the markdown and dropdown components's dictionary IDs.
-        - `dependency` - List of jobs is dependent on the completion of the value of this component (dropdown).
+        - `dependency` - List of jobs is dependent on the completion of the value of this component (dropdown),
+            i.e. that were scheduled with `depends_on` set to its value, or else whose name contains the name of that job.
+        - `match_dependents_by_name` - If False, dependent jobs are only listed if they were scheduled with `depends_on`,
+            and the name query is not sent.
         """
         if aio_id is None:
             aio_id = str(uuid.uuid4())
@@ -141,6 +151,7 @@ class DmcJobManagerMinimalAIO(html.Div):
         self._prefect_tags = prefect_tags
         self._mode = mode
         self._dependency = dependency
+        self._match_dependents_by_name = match_dependents_by_name
 
         super().__init__(
             [
@@ -201,12 +212,13 @@ class DmcJobManagerMinimalAIO(html.Div):
                 html.Div(id=self.ids.notifications_container(aio_id)),
                 dcc.Interval(
                     id=self.ids.check_job(aio_id),
-                    interval=5000,
+                    interval=CHECK_INTERVAL,
                 ),
                 dcc.Store(
                     id=self.ids.project_name_id(aio_id),
                     data="",
                 ),
+                dcc.Store(id=self.ids.content_hashes(aio_id)),
             ]
         )
 
@@ -257,13 +269,6 @@ class DmcJobManagerMinimalAIO(html.Div):
 
     def register_callbacks(self):
 
-        @callback(
-            Output(self.ids.run_dropdown(self._aio_id), "data"),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-        )
-        def check_run_job(n_intervals):
-            return _check_train_job(self._prefect_tags, self._mode)
-
         @callback(
             Output(
                 {
@@ -331,37 +336,29 @@ class DmcJobManagerMinimalAIO(html.Div):
             return None, False
 
         @callback(
-            Output(
-                {
-                    "aio_id": self._aio_id,
-                    "component": "DmcAdvancedOptionsAIO",
-                    "subcomponent": "logs-area",
-                },
-                "children",
-            ),
+            Output(self.ids.check_job(self._aio_id), "interval", allow_duplicate=True),
+            Input(self.ids.run_button(self._aio_id), "n_clicks"),
             Input(
                 {
                     "aio_id": self._aio_id,
                     "component": "DmcAdvancedOptionsAIO",
-                    "subcomponent": "advanced-options-modal",
+                    "subcomponent": "warning-confirm-cancel",
                 },
-                "opened",
+                "n_clicks",
             ),
-            Input(self.ids.check_job(self._aio_id), "n_intervals"),
-            State(
+            Input(
                 {
                     "aio_id": self._aio_id,
                     "component": "DmcAdvancedOptionsAIO",
-                    "subcomponent": "job-id",
+                    "subcomponent": "warning-confirm-delete",
                 },
-                "data",
+                "n_clicks",
             ),
             prevent_initial_call=True,
         )
-        def get_logs(is_open, n_intervals, job_id):
-            if job_id is None:
-                return "No logs available"
-            return _get_job_logs(job_id, self._mode)
+        def reset_check_interval(*n_clicks):
+            # Jobs are checked often again after user actions
+            return CHECK_INTERVAL
 
         if self._dependency:
 
@@ -370,12 +367,145 @@ class DmcJobManagerMinimalAIO(html.Div):
                     self.ids.run_dropdown(self._aio_id), "data", allow_duplicate=True
                 ),
                 Output(self.ids.run_dropdown(self._aio_id), "value"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcLogViewerAIO",
+                        "subcomponent": "log-text",
+                    },
+                    "children",
+                ),
+                Output(self.ids.check_job(self._aio_id), "interval"),
+                Output(self.ids.content_hashes(self._aio_id), "data"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
                 Input(self.ids.check_job(self._aio_id), "n_intervals"),
                 Input(self._dependency, "value"),
+                Input(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcAdvancedOptionsAIO",
+                        "subcomponent": "advanced-options-modal",
+                    },
+                    "opened",
+                ),
                 State(self.ids.project_name_id(self._aio_id), "data"),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcAdvancedOptionsAIO",
+                        "subcomponent": "job-id",
+                    },
+                    "data",
+                ),
+                State(self.ids.check_job(self._aio_id), "interval"),
+                State(self.ids.content_hashes(self._aio_id), "data"),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
                 prevent_initial_call=True,
             )
-            def check_dependant_job(n_intervals, dependant_job_id, project_name):
-                return _check_inference_job(
-                    dependant_job_id, project_name, self._prefect_tags, self._mode
+            def check_dependant_job(
+                n_intervals,
+                dependant_job_id,
+                opened,
+                project_name,
+                job_id,
+                interval,
+                hashes,
+                logs_state,
+            ):
+                _, *outputs = _check_jobs(
+                    None,
+                    self._prefect_tags + ["inference"],
+                    dependant_job_id,
+                    project_name,
+                    job_id,
+                    self._mode,
+                    _triggered_props(),
+                    interval,
+                    hashes,
+                    opened,
+                    logs_state,
+                    self._match_dependents_by_name,
+                )
+                return outputs
+
+        else:
+
+            @callback(
+                Output(self.ids.run_dropdown(self._aio_id), "data"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcLogViewerAIO",
+                        "subcomponent": "log-text",
+                    },
+                    "children",
+                ),
+                Output(self.ids.check_job(self._aio_id), "interval"),
+                Output(self.ids.content_hashes(self._aio_id), "data"),
+                Output(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
+                Input(self.ids.check_job(self._aio_id), "n_intervals"),
+                Input(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcAdvancedOptionsAIO",
+                        "subcomponent": "advanced-options-modal",
+                    },
+                    "opened",
+                ),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcAdvancedOptionsAIO",
+                        "subcomponent": "job-id",
+                    },
+                    "data",
+                ),
+                State(self.ids.check_job(self._aio_id), "interval"),
+                State(self.ids.content_hashes(self._aio_id), "data"),
+                State(
+                    {
+                        "aio_id": self._aio_id,
+                        "component": "DmcLogViewerAIO",
+                        "subcomponent": "log-state",
+                    },
+                    "data",
+                ),
+            )
+            def check_run_job(
+                n_intervals, opened, job_id, interval, hashes, logs_state
+            ):
+                jobs, _, _, *outputs = _check_jobs(
+                    self._prefect_tags + ["train"],
+                    None,
+                    None,
+                    None,
+                    job_id,
+                    self._mode,
+                    _triggered_props(),
+                    interval,
+                    hashes,
+                    opened,
+                    logs_state,
                 )
+                return jobs, *outputs
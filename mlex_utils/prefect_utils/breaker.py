@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+
+import httpx
+
+from mlex_utils.prefect_utils.deadline import PrefectTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling Prefect while the circuit breaker is open
+    """
+
+
+def is_unavailable_error(exception):
+    """
+    Returns True if the exception means that the Prefect API could not serve the request
+    (connection errors, timeouts and 5xx responses), as opposed to errors of the request
+    itself such as a missing flow run
+    """
+    if isinstance(
+        exception, (CircuitOpenError, PrefectTimeoutError, httpx.TransportError)
+    ):
+        return True
+    if isinstance(exception, httpx.HTTPStatusError):
+        return exception.response.status_code >= 500
+    return False
+
+
+def raise_if_unavailable(results):
+    """
+    Raises the first exception of results, as returned by asyncio.gather with
+    return_exceptions=True, if all the gathered calls failed because Prefect is
+    unavailable, so that they count as a failure of the call for the circuit breaker.
+    Results that are None are of calls that were not made.
+    """
+    results = [result for result in results if result is not None]
+    if results and all(
+        isinstance(result, Exception) and is_unavailable_error(result)
+        for result in results
+    ):
+        raise results[0]
+
+
+class CircuitBreaker:
+    """
+    Stops calling the Prefect API after failure_threshold consecutive failures.
+    While open, calls fail fast with CircuitOpenError instead of waiting for connect
+    timeouts. After recovery_timeout seconds the breaker is half-open and lets a single
+    probe call through: the breaker closes if it succeeds and opens again if it fails.
+    Responses reported with record_response close it as soon as Prefect answers, so a
+    long call (e.g. wait_for_flow_runs) made as the probe does not hold the others back.
+    Only failures for which is_unavailable_error is True are counted.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.recovery_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError if the call is not allowed. Otherwise, the outcome of
+        the call must be reported with record_success, record_failure or
+        record_cancelled.
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError("Prefect API is unavailable, retrying later")
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Prefect API is available again")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_response(self, response):
+        """
+        Records an HTTP response received while a call is still running. Responses other
+        than server errors count as a success.
+        """
+        if response.status_code < 500:
+            self.record_success()
+
+    def record_failure(self, exception):
+        """
+        Counts the exception as a failure if it means that Prefect is unavailable
+        """
+        if not is_unavailable_error(exception):
+            self.record_success()
+            return
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Prefect API is unavailable after {self._failures} "
+                        f"failures: {exception}"
+                    )
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def record_cancelled(self):
+        """
+        Releases the probe of a half-open breaker if the call did not complete
+        """
+        with self._lock:
+            self._probing = False
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
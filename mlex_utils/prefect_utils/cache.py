@@ -0,0 +1,204 @@
+import concurrent.futures
+import threading
+import time
+from collections import OrderedDict
+
+from mlex_utils.prefect_utils.client import settings_key
+from mlex_utils.prefect_utils.deadline import PrefectTimeoutError, remaining_time
+
+
+class DeploymentCache:
+    """
+    TTL cache of deployment metadata (id, parameter schema, work pool, ...) keyed by
+    deployment name and the active Prefect settings.
+    Missing deployments are cached as None for negative_ttl seconds.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=10):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, deployment_name):
+        """
+        Returns a (hit, deployment) tuple, where deployment is None for cached misses
+        """
+        key = (settings_key(), deployment_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, deployment = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            return True, deployment
+
+    def set(self, deployment_name, deployment):
+        ttl = self.ttl if deployment is not None else self.negative_ttl
+        key = (settings_key(), deployment_name)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, deployment)
+
+    def invalidate(self, deployment_name=None):
+        """
+        Drops the entries of the given deployment name, or all entries if None
+        """
+        with self._lock:
+            if deployment_name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] == deployment_name]:
+                    del self._entries[key]
+
+
+class TTLCache:
+    """
+    Thread-safe cache whose entries expire after ttl seconds, with least recently used
+    entries evicted beyond maxsize.
+    Concurrent misses on the same key wait for a single in-flight load ("single-flight")
+    instead of each calling the loader.
+    Expired values are retained for stale_ttl more seconds, so that they can be served
+    as stale if reloading them fails (see get_or_load).
+    """
+
+    def __init__(self, ttl=2, maxsize=256, stale_ttl=0):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, on_stale=None):
+        """
+        Returns the cached value of key, or calls loader() to compute and cache it.
+        Waiting for the in-flight load of another caller is bounded by the current
+        deadline.
+        If loader raises an exception and an expired value of key is retained,
+        on_stale(value, exception) is returned instead, if given. on_stale may mark the
+        value as stale, or re-raise the exception.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            stale_entry = None
+            if entry is not None and entry[0] + self.stale_ttl > now:
+                stale_entry = entry
+            else:
+                self._entries.pop(key, None)
+            future = self._in_flight.get(key)
+            is_loader = future is None
+            if is_loader:
+                self.misses += 1
+                future = self._in_flight[key] = concurrent.futures.Future()
+                generation = self._generation
+            else:
+                self.coalesced += 1
+        if not is_loader:
+            try:
+                return future.result(remaining_time())
+            except TimeoutError:
+                if future.done():
+                    raise
+                raise PrefectTimeoutError(
+                    "Deadline exceeded while waiting for a cached value"
+                ) from None
+
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            if on_stale is None or stale_entry is None:
+                future.set_exception(e)
+                raise
+            try:
+                value = on_stale(stale_entry[1], e)
+            except Exception as stale_e:
+                future.set_exception(stale_e)
+                raise
+            with self._lock:
+                self.stale += 1
+            future.set_result(value)
+            return value
+        with self._lock:
+            self._in_flight.pop(key, None)
+            # Values loaded before an invalidation may be stale and are not cached
+            if generation == self._generation and self.ttl > 0:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale": self.stale,
+                "size": len(self._entries),
+            }
+
+
+class LRUCache:
+    """
+    Thread-safe cache without expiration. Entries are only removed explicitly or when
+    they are the least recently used beyond maxsize.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+deployment_cache = DeploymentCache()
+# Query results are served as stale for up to an hour while Prefect is unavailable
+query_cache = TTLCache(stale_ttl=3600)
+# Flow runs in a final state and their logs, keyed by Prefect settings and flow run id
+final_flow_run_cache = LRUCache(maxsize=1024)
+final_logs_cache = LRUCache(maxsize=64)
@@ -0,0 +1,295 @@
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+
+import httpx
+from prefect import get_client
+from prefect.context import get_settings_context
+
+from mlex_utils.prefect_utils.breaker import CircuitBreaker
+from mlex_utils.prefect_utils.deadline import PrefectTimeoutError, remaining_time
+from mlex_utils.prefect_utils.metrics import HTTPX_EVENT_HOOKS
+
+logger = logging.getLogger(__name__)
+
+
+_settings_key_memo = (None, None)
+
+
+def settings_key():
+    """
+    Returns a hash key of the active Prefect settings.
+    Settings objects are immutable, so the key of the last one seen is memoized.
+    """
+    global _settings_key_memo
+    settings = get_settings_context().settings
+    memo_settings, memo_key = _settings_key_memo
+    if settings is not memo_settings:
+        memo_key = settings.hash_key()
+        _settings_key_memo = (settings, memo_key)
+    return memo_key
+
+
+def _copy_task_result(future, task):
+    if future.done():
+        return
+    try:
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+    except concurrent.futures.InvalidStateError:
+        # The future was failed by a deadline in the meantime
+        pass
+
+
+class PrefectClientManager:
+    """
+    Process-wide owner of a shared PrefectClient.
+    The client lives on a background event loop thread and keeps its connection pool
+    open between calls, so the sync helpers in prefect_utils.core do not pay for a new
+    event loop, client and TCP/TLS handshake on every call.
+    The client is reopened whenever the active Prefect settings change (e.g. a
+    different PREFECT_API_URL or a test harness database).
+    Calls go through circuit_breaker, so they fail fast while Prefect is unavailable.
+    """
+
+    def __init__(
+        self,
+        max_connections=16,
+        max_keepalive_connections=8,
+        keepalive_expiry=25,
+        shutdown_timeout=5,
+        circuit_breaker=None,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._shutdown_timeout = shutdown_timeout
+        self.circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        )
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._client_lock = None
+        self._client = None
+        self._client_key = None
+        self._client_task = None
+        self._client_stop = None
+
+    @property
+    def loop(self):
+        """
+        Returns the background event loop, starting its thread if needed
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_loop,
+                    args=(loop,),
+                    name="mlex-prefect-client",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+                self._client_lock = asyncio.Lock()
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    async def get_client(self):
+        """
+        Returns the shared client, opening it on first use or when the active Prefect
+        settings differ from the ones the current client was opened with.
+        Must be awaited on the background loop.
+        """
+        key = settings_key()
+        async with self._client_lock:
+            if self._client is None or key != self._client_key:
+                await self._close_client()
+                await self._open_client()
+                self._client_key = key
+            return self._client
+
+    async def _open_client(self):
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+
+        # The client is entered and exited within this task, which keeps the lifespan
+        # of ephemeral Prefect apps in a single task
+        async def _hold_client():
+            try:
+                async with get_client(
+                    httpx_settings={
+                        "limits": self._limits,
+                        "event_hooks": {
+                            **HTTPX_EVENT_HOOKS,
+                            "response": HTTPX_EVENT_HOOKS["response"]
+                            + [self._observe_response],
+                        },
+                    }
+                ) as client:
+                    ready.set_result(client)
+                    await stop.wait()
+            except Exception as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                else:
+                    logger.warning(f"Failed to close Prefect client: {e}")
+
+        task = asyncio.create_task(_hold_client())
+        self._client = await ready
+        self._client_task, self._client_stop = task, stop
+
+    async def _observe_response(self, response):
+        # The circuit breaker does not wait for the end of long calls to know that
+        # Prefect is answering
+        self.circuit_breaker.record_response(response)
+
+    async def _close_client(self):
+        if self._client_task is not None:
+            self._client_stop.set()
+            await self._client_task
+        self._client = None
+        self._client_key = None
+        self._client_task = None
+        self._client_stop = None
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedules the coroutine function fn(*args, client=client, **kwargs) on the
+        background loop with the shared client and returns a concurrent.futures.Future.
+        The call runs in a copy of the caller's context, so temporary Prefect settings
+        are honored.
+        Raises CircuitOpenError without scheduling the call while the circuit breaker
+        is open, and PrefectTimeoutError if the current deadline has passed.
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError(
+                "PrefectClientManager cannot be called from its own event loop"
+            )
+        remaining_time()
+        self.circuit_breaker.before_call()
+        context = contextvars.copy_context()
+        future = concurrent.futures.Future()
+        future.add_done_callback(self._record_outcome)
+
+        async def _call():
+            client = await self.get_client()
+            return await fn(*args, client=client, **kwargs)
+
+        def _start():
+            if future.done():
+                return
+            task = loop.create_task(_call(), context=context)
+            task.add_done_callback(lambda task: _copy_task_result(future, task))
+
+            def _cancel_task(future):
+                # The future is cancelled, or failed by run when the deadline passes
+                if future.cancelled() or isinstance(
+                    future.exception(), PrefectTimeoutError
+                ):
+                    loop.call_soon_threadsafe(task.cancel)
+
+            future.add_done_callback(_cancel_task)
+
+        loop.call_soon_threadsafe(_start)
+        return future
+
+    def _record_outcome(self, future):
+        if future.cancelled():
+            self.circuit_breaker.record_cancelled()
+        elif future.exception() is not None:
+            self.circuit_breaker.record_failure(future.exception())
+        else:
+            self.circuit_breaker.record_success()
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Runs the coroutine function fn(*args, client=client, **kwargs) on the background
+        loop with the shared client and blocks until it returns.
+        The call is cancelled and PrefectTimeoutError is raised when the current
+        deadline passes (see prefect_utils.deadline), which counts as a failure for the
+        circuit breaker.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(remaining_time())
+        except TimeoutError:
+            if future.done():
+                raise
+            error = PrefectTimeoutError("Deadline exceeded while calling Prefect")
+            try:
+                future.set_exception(error)
+            except concurrent.futures.InvalidStateError:
+                # The call completed in the meantime
+                return future.result()
+            raise error from None
+
+    def shutdown(self):
+        """
+        Closes the shared client and stops the background loop
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_client(), loop).result(
+                self._shutdown_timeout
+            )
+        except Exception as e:
+            logger.warning(f"Failed to close Prefect client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(self._shutdown_timeout)
+        if not thread.is_alive():
+            loop.close()
+
+    def after_fork(self):
+        """
+        Drops the loop and client inherited from the parent process.
+        Neither the loop thread nor the client's sockets can be used in a forked child
+        (e.g. gunicorn workers), so the child lazily opens its own on first use.
+        """
+        self._reset()
+        self.circuit_breaker.reset()
+
+
+@asynccontextmanager
+async def client_context(client=None):
+    """
+    Yields the given client, or a new client that is closed on exit if none is given
+    """
+    if client is not None:
+        yield client
+    else:
+        async with get_client(
+            httpx_settings={"event_hooks": HTTPX_EVENT_HOOKS}
+        ) as client:
+            yield client
+
+
+client_manager = PrefectClientManager()
+
+atexit.register(client_manager.shutdown)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=client_manager.after_fork)
@@ -1,183 +1,1713 @@
 import asyncio
-from typing import Optional
+import copy
+from datetime import timedelta
+from typing import NamedTuple, Optional
 
-from prefect import get_client
+import pendulum
 from prefect.client.schemas.filters import (
     FlowRunFilter,
+    FlowRunFilterExpectedStartTime,
+    FlowRunFilterId,
     FlowRunFilterName,
     FlowRunFilterParentFlowRunId,
+    FlowRunFilterState,
+    FlowRunFilterStateType,
     FlowRunFilterTags,
     LogFilter,
     LogFilterFlowRunId,
+    LogFilterTimestamp,
+    TaskRunFilter,
+    TaskRunFilterId,
 )
 from prefect.client.schemas.objects import State, StateType
-from prefect.client.schemas.sorting import LogSort
+from prefect.client.schemas.sorting import FlowRunSort, LogSort
+from prefect.exceptions import ObjectNotFound
+
+from mlex_utils.prefect_utils.breaker import is_unavailable_error, raise_if_unavailable
+from mlex_utils.prefect_utils.cache import (
+    deployment_cache,
+    final_flow_run_cache,
+    final_logs_cache,
+    query_cache,
+)
+from mlex_utils.prefect_utils.client import client_context, client_manager, settings_key
+from mlex_utils.prefect_utils.deadline import deadline, timeout_context
+from mlex_utils.prefect_utils.metrics import instrument
+
+FINAL_STATE_TYPES = [
+    StateType.COMPLETED,
+    StateType.FAILED,
+    StateType.CANCELLED,
+    StateType.CRASHED,
+]
+
+# Conditions of wait_for_flow_runs, named after the ones of concurrent.futures.wait
+ALL_COMPLETED = "ALL_COMPLETED"
+FIRST_COMPLETED = "FIRST_COMPLETED"
+FIRST_EXCEPTION = "FIRST_EXCEPTION"
+
+# Callbacks called after flow runs are created, deleted or change state
+_flow_run_change_callbacks = []
+
+
+def on_flow_runs_changed(callback):
+    """
+    Registers callback to be called without arguments after flow runs are created,
+    deleted or change state through this module, e.g. to drop the flow run lists
+    derived from earlier queries.
+    """
+    _flow_run_change_callbacks.append(callback)
+
+
+def _flow_runs_changed():
+    query_cache.clear()
+    for callback in _flow_run_change_callbacks:
+        callback()
+
+
+class _RateLimiter:
+    """
+    Spaces out calls to wait() so that at most `rate` of them return per second
+    """
+
+    def __init__(self, rate=None):
+        self._interval = 1 / rate if rate else 0
+        self._next_time = 0
+
+    async def wait(self):
+        if not self._interval:
+            return
+        now = asyncio.get_running_loop().time()
+        delay = self._next_time - now
+        self._next_time = max(now, self._next_time) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@instrument
+async def _read_deployment_uncached(client, deployment_name: str):
+    try:
+        return await client.read_deployment_by_name(deployment_name)
+    except ObjectNotFound:
+        return None
+
+
+async def _read_deployment(client, deployment_name: str):
+    hit, deployment = deployment_cache.get(deployment_name)
+    if not hit:
+        deployment = await _read_deployment_uncached(client, deployment_name)
+        deployment_cache.set(deployment_name, deployment)
+    assert (
+        deployment
+    ), f"No deployment found in config for deployment_name {deployment_name}"
+    return deployment
+
+
+async def aget_deployment(deployment_name: str, timeout=None, client=None):
+    async with timeout_context(timeout), client_context(client) as client:
+        return await _read_deployment(client, deployment_name)
+
+
+def get_deployment(deployment_name: str, timeout=None):
+    """
+    Retrieves the deployment with the given name, including its id, parameter schema
+    and work pool. Results are cached for deployment_cache.ttl seconds.
+    """
+    with deadline(timeout):
+        return client_manager.run(aget_deployment, deployment_name)
+
+
+def invalidate_deployment_cache(deployment_name: Optional[str] = None):
+    """
+    Drops the cached metadata of the given deployment, or of all deployments if None.
+    Call it after redeploying a flow.
+    """
+    deployment_cache.invalidate(deployment_name)
+
+
+@instrument
+async def _create_flow_run(
+    client,
+    deployment_id,
+    flow_run_name: str,
+    parameters: Optional[dict] = None,
+    tags: Optional[list] = [],
+):
+    flow_run = await client.create_flow_run_from_deployment(
+        deployment_id,
+        parameters=parameters,
+        name=flow_run_name,
+        tags=tags,
+    )
+    _flow_runs_changed()
+    return flow_run.id
 
 
 async def _schedule(
+    client,
     deployment_name: str,
     flow_run_name: str,
     parameters: Optional[dict] = None,
     tags: Optional[list] = [],
 ):
-    async with get_client() as client:
-        deployment = await client.read_deployment_by_name(deployment_name)
-        assert (
-            deployment
-        ), f"No deployment found in config for deployment_name {deployment_name}"
-        flow_run = await client.create_flow_run_from_deployment(
-            deployment.id,
-            parameters=parameters,
-            name=flow_run_name,
-            tags=tags,
-        )
-    return flow_run.id
+    deployment = await _read_deployment(client, deployment_name)
+    return await _create_flow_run(
+        client, deployment.id, flow_run_name, parameters, tags
+    )
 
 
-def schedule_prefect_flow(
+def _default_flow_run_name(deployment_name, parameters):
+    model_name = parameters["model_name"]
+    return f"{deployment_name}: {model_name}"
+
+
+def dependency_tag(flow_run_id):
+    """
+    Returns the tag of the flow runs scheduled with depends_on set to flow_run_id
+    """
+    return f"depends-on:{flow_run_id}"
+
+
+def _dependent_tags(tags, depends_on):
+    if depends_on is None:
+        return tags
+    return list(tags or []) + [dependency_tag(depends_on)]
+
+
+async def aschedule_prefect_flow(
     deployment_name: str,
     parameters: Optional[dict] = None,
     flow_run_name: Optional[str] = None,
     tags: Optional[list] = [],
+    depends_on=None,
+    timeout=None,
+    client=None,
 ):
+    """
+    Async version of schedule_prefect_flow
+    """
     if not flow_run_name:
-        model_name = parameters["model_name"]
-        flow_run_name = f"{deployment_name}: {model_name}"
-    flow_run_id = asyncio.run(
-        _schedule(deployment_name, flow_run_name, parameters, tags)
-    )
-    return flow_run_id
+        flow_run_name = _default_flow_run_name(deployment_name, parameters)
+    tags = _dependent_tags(tags, depends_on)
+    async with timeout_context(timeout), client_context(client) as client:
+        return await _schedule(client, deployment_name, flow_run_name, parameters, tags)
+
+
+def schedule_prefect_flow(
+    deployment_name: str,
+    parameters: Optional[dict] = None,
+    flow_run_name: Optional[str] = None,
+    tags: Optional[list] = [],
+    depends_on=None,
+    timeout=None,
+):
+    """
+    Schedules a flow run from the deployment.
+    If depends_on is given, the flow run is tagged with dependency_tag(depends_on) so that
+    it can be found as a dependent of that flow run, e.g. an inference run of a train run.
+    """
+    with deadline(timeout):
+        flow_run_id = client_manager.run(
+            aschedule_prefect_flow,
+            deployment_name,
+            parameters,
+            flow_run_name,
+            tags,
+            depends_on,
+        )
+        return flow_run_id
+
+
+async def aschedule_prefect_flows(
+    deployment_name: str,
+    parameters_list: list,
+    flow_run_names: Optional[list] = None,
+    tags: Optional[list] = [],
+    max_concurrency: int = 10,
+    depends_on=None,
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of schedule_prefect_flows
+    """
+    tags = _dependent_tags(tags, depends_on)
+    if flow_run_names is None:
+        flow_run_names = [None] * len(parameters_list)
+    assert len(flow_run_names) == len(
+        parameters_list
+    ), "flow_run_names and parameters_list must have the same length"
+
+    semaphore = asyncio.Semaphore(max_concurrency)
 
+    async def _create(client, deployment_id, parameters, flow_run_name):
+        if not flow_run_name:
+            flow_run_name = _default_flow_run_name(deployment_name, parameters)
+        async with semaphore:
+            return await _create_flow_run(
+                client, deployment_id, flow_run_name, parameters, tags
+            )
 
+    async with timeout_context(timeout), client_context(client) as client:
+        deployment = await _read_deployment(client, deployment_name)
+        results = await asyncio.gather(
+            *[
+                _create(client, deployment.id, parameters, flow_run_name)
+                for parameters, flow_run_name in zip(parameters_list, flow_run_names)
+            ],
+            return_exceptions=True,
+        )
+
+    flow_run_ids = []
+    errors = []
+    for result in results:
+        if isinstance(result, Exception):
+            flow_run_ids.append(None)
+            errors.append(result)
+        else:
+            flow_run_ids.append(result)
+            errors.append(None)
+    return flow_run_ids, errors
+
+
+def schedule_prefect_flows(
+    deployment_name: str,
+    parameters_list: list,
+    flow_run_names: Optional[list] = None,
+    tags: Optional[list] = [],
+    max_concurrency: int = 10,
+    depends_on=None,
+    timeout=None,
+):
+    """
+    Schedules one flow run per entry of parameters_list from the same deployment.
+    The deployment is resolved once and at most max_concurrency runs are created at a time.
+    If depends_on is given, the flow runs are tagged as dependents of that flow run
+    (see schedule_prefect_flow).
+    Returns the list of flow run ids and the list of errors, both in input order.
+    Entries that failed have a None id and the raised exception as error.
+    """
+    with deadline(timeout):
+        return client_manager.run(
+            aschedule_prefect_flows,
+            deployment_name,
+            parameters_list,
+            flow_run_names,
+            tags,
+            max_concurrency,
+            depends_on,
+        )
+
+
+@instrument
 async def _delete(
+    client,
     flow_run_id: str,
 ):
-    async with get_client() as client:
-        await client.delete_flow_run(flow_run_id)
+    await client.delete_flow_run(flow_run_id)
+    _flow_runs_changed()
+    evict_final_flow_run(flow_run_id)
+
+
+async def adelete_flow_run(flow_run_id: str, timeout=None, client=None):
+    async with timeout_context(timeout), client_context(client) as client:
+        await _delete(client, flow_run_id)
+
+
+def delete_flow_run(flow_run_id: str, timeout=None):
+    with deadline(timeout):
+        client_manager.run(adelete_flow_run, flow_run_id)
+
+
+def _purge_filter(tags=None, older_than=None, states=FINAL_STATE_TYPES):
+    if isinstance(older_than, timedelta):
+        older_than = pendulum.now("UTC") - older_than
+    elif older_than is not None:
+        older_than = pendulum.instance(older_than)
+    return FlowRunFilter(
+        tags=FlowRunFilterTags(all_=tags) if tags else None,
+        expected_start_time=(
+            FlowRunFilterExpectedStartTime(before_=older_than)
+            if older_than is not None
+            else None
+        ),
+        state=(
+            FlowRunFilterState(type=FlowRunFilterStateType(any_=states))
+            if states
+            else None
+        ),
+    )
+
+
+@instrument
+async def _read_purge_page(client, flow_run_filter, page_size, offset):
+    return await client.read_flow_runs(
+        flow_run_filter=flow_run_filter,
+        sort=FlowRunSort.EXPECTED_START_TIME_ASC,
+        limit=page_size,
+        offset=offset,
+    )
+
+
+async def apurge_flow_runs(
+    tags=None,
+    older_than=None,
+    states=FINAL_STATE_TYPES,
+    dry_run=True,
+    max_concurrency=10,
+    rate_limit=None,
+    page_size=200,
+    progress_callback=None,
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of purge_flow_runs
+    """
+    flow_run_filter = _purge_filter(tags, older_than, states)
+    report = {"dry_run": dry_run, "matched": 0, "deleted": 0, "failed": {}}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rate_limiter = _RateLimiter(rate_limit)
 
+    async def _purge(flow_run_id):
+        try:
+            async with semaphore:
+                await rate_limiter.wait()
+                await _delete(client, flow_run_id)
+            report["deleted"] += 1
+        except Exception as e:
+            report["failed"][str(flow_run_id)] = e
 
-def delete_flow_run(flow_run_id: str):
-    asyncio.run(_delete(flow_run_id))
+    async with timeout_context(timeout), client_context(client) as client:
+        while True:
+            # Deleted runs no longer match the filter, so only the runs that were
+            # listed (dry run) or that failed to delete are skipped on the next page
+            offset = report["matched"] if dry_run else len(report["failed"])
+            flow_runs = await _read_purge_page(
+                client, flow_run_filter, page_size, offset
+            )
+            report["matched"] += len(flow_runs)
+            if not dry_run:
+                await asyncio.gather(*[_purge(flow_run.id) for flow_run in flow_runs])
+            if progress_callback is not None:
+                progress_callback(report)
+            if len(flow_runs) < page_size:
+                return report
 
 
+def purge_flow_runs(
+    tags=None,
+    older_than=None,
+    states=FINAL_STATE_TYPES,
+    dry_run=True,
+    max_concurrency=10,
+    rate_limit=None,
+    page_size=200,
+    progress_callback=None,
+    timeout=None,
+):
+    """
+    Deletes the flow runs that have all the given tags, are in one of the given states
+    and were expected to start before older_than (a datetime or a timedelta from now).
+    Matches are read in pages of page_size and deleted with at most max_concurrency
+    requests in flight and at most rate_limit deletions per second.
+    If dry_run is True, the matches are only counted.
+    progress_callback, if given, is called with the report after each page, from the
+    thread of the shared client.
+    Returns a report with the number of "matched" and "deleted" flow runs and a "failed"
+    dictionary that maps ids to the raised exception.
+    """
+    with deadline(timeout):
+        return client_manager.run(
+            apurge_flow_runs,
+            tags,
+            older_than,
+            states,
+            dry_run,
+            max_concurrency,
+            rate_limit,
+            page_size,
+            progress_callback,
+        )
+
+
+@instrument
 async def _set_state(
+    client,
     flow_run_id: str,
     state: StateType,
     force: bool = False,
 ):
-    async with get_client() as client:
-        await client.set_flow_run_state(flow_run_id, state, force=force)
+    await client.set_flow_run_state(flow_run_id, state, force=force)
+    _flow_runs_changed()
+    evict_final_flow_run(flow_run_id)
 
 
-async def _get_flow_run_state(flow_run_id):
-    async with get_client() as client:
-        flow_run = await client.read_flow_run(flow_run_id)
-        return flow_run.state
+async def _get_flow_run_state(client, flow_run_id):
+    flow_run = await _read_flow_run(client, flow_run_id)
+    return flow_run.state
 
 
-def get_flow_run_state(flow_run_id):
-    flow_run_state = asyncio.run(_get_flow_run_state(flow_run_id))
+async def aget_flow_run_state(flow_run_id, timeout=None, client=None):
+    async with timeout_context(timeout), client_context(client) as client:
+        flow_run_state = await _get_flow_run_state(client, flow_run_id)
     return flow_run_state.type
 
 
-def cancel_flow_run(flow_run_id: str):
-    flow_run_state = asyncio.run(_get_flow_run_state(flow_run_id))
-    if not flow_run_state.is_final():
-        asyncio.run(_set_state(flow_run_id, State(type=StateType.CANCELLED)))
-    pass
+def get_flow_run_state(flow_run_id, timeout=None):
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_state, flow_run_id)
+
+
+async def acancel_flow_run(flow_run_id: str, timeout=None, client=None):
+    async with timeout_context(timeout), client_context(client) as client:
+        flow_run_state = await _get_flow_run_state(client, flow_run_id)
+        if not flow_run_state.is_final():
+            await _set_state(client, flow_run_id, State(type=StateType.CANCELLED))
+
+
+def cancel_flow_run(flow_run_id: str, timeout=None):
+    with deadline(timeout):
+        client_manager.run(acancel_flow_run, flow_run_id)
+
+
+async def acancel_flow_runs(
+    flow_run_ids=None,
+    flow_run_filter=None,
+    include_children=True,
+    max_concurrency=10,
+    page_size=200,
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of cancel_flow_runs
+    """
+    assert (flow_run_ids is None) != (
+        flow_run_filter is None
+    ), "Either flow_run_ids or flow_run_filter must be provided"
+    report = {"cancelled": [], "skipped": [], "failed": {}}
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _cancel(flow_run):
+        flow_run_id = str(flow_run.id)
+        if flow_run.state is not None and flow_run.state.is_final():
+            report["skipped"].append(flow_run_id)
+            return
+        try:
+            async with semaphore:
+                await _set_state(client, flow_run.id, State(type=StateType.CANCELLED))
+            report["cancelled"].append(flow_run_id)
+        except Exception as e:
+            report["failed"][flow_run_id] = e
+
+    async with timeout_context(timeout), client_context(client) as client:
+        if flow_run_ids is not None:
+            flow_run_ids = [str(flow_run_id) for flow_run_id in flow_run_ids]
+            flow_runs = await _read_flow_runs_by_id(client, flow_run_ids, page_size)
+        else:
+            flow_runs = await _read_all_flow_runs(client, flow_run_filter, page_size)
+
+        seen = set()
+        while flow_runs:
+            flow_runs = [
+                flow_run for flow_run in flow_runs if str(flow_run.id) not in seen
+            ]
+            seen.update(str(flow_run.id) for flow_run in flow_runs)
+            await asyncio.gather(*[_cancel(flow_run) for flow_run in flow_runs])
+            if not include_children or not flow_runs:
+                break
+            flow_runs = await _read_children_flow_runs(
+                client, [str(flow_run.id) for flow_run in flow_runs], page_size
+            )
+    return report
+
+
+def cancel_flow_runs(
+    flow_run_ids=None,
+    flow_run_filter=None,
+    include_children=True,
+    max_concurrency=10,
+    page_size=200,
+    timeout=None,
+):
+    """
+    Cancels the given flow runs, or the ones matching flow_run_filter.
+    If include_children is True, their descendants are cancelled level by level with one
+    query per level. Runs that are already in a final state are skipped.
+    Returns a report with the lists of "cancelled" and "skipped" ids and a "failed"
+    dictionary that maps ids to the raised exception.
+    """
+    with deadline(timeout):
+        return client_manager.run(
+            acancel_flow_runs,
+            flow_run_ids,
+            flow_run_filter,
+            include_children,
+            max_concurrency,
+            page_size,
+        )
+
+
+async def _read_flow_runs_by_id(client, flow_run_ids, page_size=200):
+    cached_flow_runs = []
+    missing_flow_run_ids = []
+    for flow_run_id in flow_run_ids:
+        flow_run = final_flow_run_cache.get(_final_cache_key(flow_run_id))
+        if flow_run is not None:
+            cached_flow_runs.append(flow_run)
+        else:
+            missing_flow_run_ids.append(flow_run_id)
+    flow_runs = await _read_flow_runs_by_id_uncached(
+        client, missing_flow_run_ids, page_size
+    )
+    for flow_run in flow_runs:
+        _cache_final_flow_run(flow_run)
+    return cached_flow_runs + flow_runs
+
+
+@instrument
+async def _read_flow_runs_by_id_uncached(client, flow_run_ids, page_size=200):
+    pages = [
+        flow_run_ids[i : i + page_size] for i in range(0, len(flow_run_ids), page_size)
+    ]
+    results = await asyncio.gather(
+        *[
+            client.read_flow_runs(
+                flow_run_filter=FlowRunFilter(id=FlowRunFilterId(any_=page)),
+                limit=len(page),
+            )
+            for page in pages
+        ]
+    )
+    return [flow_run for flow_runs in results for flow_run in flow_runs]
+
+
+@instrument
+async def _read_all_flow_runs(client, flow_run_filter, page_size=200, **kwargs):
+    flow_runs = []
+    while True:
+        page = await client.read_flow_runs(
+            flow_run_filter=flow_run_filter,
+            limit=page_size,
+            offset=len(flow_runs),
+            **kwargs,
+        )
+        flow_runs.extend(page)
+        if len(page) < page_size:
+            return flow_runs
+
+
+async def _read_children_flow_runs(client, parent_flow_run_ids, page_size=200):
+    pages = [
+        parent_flow_run_ids[i : i + page_size]
+        for i in range(0, len(parent_flow_run_ids), page_size)
+    ]
+    results = await asyncio.gather(
+        *[
+            _read_all_flow_runs(
+                client,
+                FlowRunFilter(
+                    parent_flow_run_id=FlowRunFilterParentFlowRunId(any_=page)
+                ),
+                page_size,
+            )
+            for page in pages
+        ]
+    )
+    return [flow_run for flow_runs in results for flow_run in flow_runs]
+
+
+def _flow_run_state_info(flow_run):
+    return {
+        "state_type": flow_run.state_type,
+        "state_name": flow_run.state_name,
+        "timestamp": flow_run.state.timestamp if flow_run.state else None,
+        "start_time": flow_run.start_time,
+        "end_time": flow_run.end_time,
+    }
+
+
+async def aget_flow_run_states(flow_run_ids, page_size=200, timeout=None, client=None):
+    """
+    Async version of get_flow_run_states
+    """
+    flow_run_ids = list(dict.fromkeys(str(flow_run_id) for flow_run_id in flow_run_ids))
+    async with timeout_context(timeout), client_context(client) as client:
+        flow_runs = await _read_flow_runs_by_id(client, flow_run_ids, page_size)
+    return {str(flow_run.id): _flow_run_state_info(flow_run) for flow_run in flow_runs}
+
+
+def get_flow_run_states(flow_run_ids, page_size=200, timeout=None):
+    """
+    Retrieves the states of many flow runs with one request per page of page_size ids.
+    Returns a dictionary that maps each flow run id to its state_type, state_name,
+    state timestamp, start_time and end_time. Ids that do not exist are left out.
+    """
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_states, flow_run_ids, page_size)
 
 
-async def _get_name(flow_run_id, is_completed):
-    async with get_client() as client:
-        flow_run = await client.read_flow_run(flow_run_id)
-        if flow_run and not is_completed:
+async def await_flow_runs(
+    flow_run_ids,
+    timeout=None,
+    return_when=ALL_COMPLETED,
+    poll_interval=1,
+    max_poll_interval=30,
+    backoff=2,
+    page_size=200,
+    client=None,
+):
+    """
+    Async version of wait_for_flow_runs
+    """
+    assert return_when in (
+        ALL_COMPLETED,
+        FIRST_COMPLETED,
+        FIRST_EXCEPTION,
+    ), f"Invalid return_when {return_when}"
+    pending = {str(flow_run_id): None for flow_run_id in flow_run_ids}
+    done = {}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    interval = poll_interval
+    async with timeout_context(), client_context(client) as client:
+        while pending:
+            # Only the flow runs that are still pending are read, in one batch
+            flow_runs = await _read_flow_runs_by_id(client, list(pending), page_size)
+            missing_flow_run_ids = set(pending) - {
+                str(flow_run.id) for flow_run in flow_runs
+            }
+            if missing_flow_run_ids:
+                # Flow runs that do not exist (or were deleted) would never complete
+                raise ObjectNotFound(
+                    None, f"Flow runs not found: {', '.join(missing_flow_run_ids)}"
+                )
+            changed = False
+            failed = False
+            for flow_run in flow_runs:
+                flow_run_id = str(flow_run.id)
+                state_info = _flow_run_state_info(flow_run)
+                if pending[flow_run_id] != state_info:
+                    changed = True
+                if flow_run.state is not None and flow_run.state.is_final():
+                    del pending[flow_run_id]
+                    done[flow_run_id] = state_info
+                    failed |= flow_run.state_type != StateType.COMPLETED
+                else:
+                    pending[flow_run_id] = state_info
+            if (
+                not pending
+                or (return_when == FIRST_COMPLETED and done)
+                or (return_when == FIRST_EXCEPTION and failed)
+            ):
+                break
+            interval = (
+                poll_interval if changed else min(interval * backoff, max_poll_interval)
+            )
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                interval = min(interval, remaining)
+            await asyncio.sleep(interval)
+    return done, pending
+
+
+def wait_for_flow_runs(
+    flow_run_ids,
+    timeout=None,
+    return_when=ALL_COMPLETED,
+    poll_interval=1,
+    max_poll_interval=30,
+    backoff=2,
+    page_size=200,
+):
+    """
+    Waits until the flow runs reach a final state, similarly to concurrent.futures.wait.
+    - `return_when` - ALL_COMPLETED returns once every flow run is final, FIRST_COMPLETED
+      once any of them is final, and FIRST_EXCEPTION once any of them ends in a state
+      other than COMPLETED (or when all are final).
+    - `timeout` - Maximum number of seconds to wait. None waits indefinitely.
+    An enclosing deadline (see prefect_utils.deadline) raises PrefectTimeoutError
+    instead.
+    All pending flow runs are polled together with one request per page of page_size
+    ids. Polls are poll_interval seconds apart, and the interval grows by `backoff` up to
+    max_poll_interval while no state changes.
+    Returns a (done, pending) tuple of dictionaries that map flow run ids to their state
+    info, as returned by get_flow_run_states.
+    Raises ObjectNotFound if any of the flow runs does not exist or is deleted while waiting.
+    await_flow_runs is the async version, to be awaited from a running event loop.
+    """
+    return client_manager.run(
+        await_flow_runs,
+        flow_run_ids,
+        timeout,
+        return_when,
+        poll_interval,
+        max_poll_interval,
+        backoff,
+        page_size,
+    )
+
+
+async def _get_name(client, flow_run_id, is_completed):
+    flow_run = await _read_flow_run(client, flow_run_id)
+    if flow_run and not is_completed:
+        return flow_run.name
+    elif flow_run and flow_run.state.is_final():
+        if flow_run.state.is_completed():
             return flow_run.name
-        elif flow_run and flow_run.state.is_final():
-            if flow_run.state.is_completed():
-                return flow_run.name
-        return None
+    return None
 
 
-def get_flow_run_name(flow_run_id, is_completed=False):
+async def aget_flow_run_name(
+    flow_run_id, is_completed=False, timeout=None, client=None
+):
+    """
+    Async version of get_flow_run_name
+    """
+    async with timeout_context(timeout), client_context(client) as client:
+        return await _get_name(client, flow_run_id, is_completed)
+
+
+def get_flow_run_name(flow_run_id, is_completed=False, timeout=None):
     """
     Retrieves the name of the flow with the given id.
     If is_completed is True, it will return the name of the flow only if it is completed.
     """
-    return asyncio.run(_get_name(flow_run_id, is_completed))
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_name, flow_run_id, is_completed)
 
 
+def _flow_run_filter(
+    tags=None, flow_run_name=None, parent_flow_run_ids=None, states=None
+):
+    return FlowRunFilter(
+        name=FlowRunFilterName(like_=flow_run_name),
+        parent_flow_run_id=(
+            FlowRunFilterParentFlowRunId(any_=parent_flow_run_ids)
+            if parent_flow_run_ids
+            else None
+        ),
+        tags=FlowRunFilterTags(all_=tags),
+        state=(
+            FlowRunFilterState(type=FlowRunFilterStateType(any_=states))
+            if states
+            else None
+        ),
+    )
+
+
+@instrument
 async def _flow_run_query(
-    tags=None, flow_run_name=None, parent_flow_run_id=None, sort="START_TIME_DESC"
+    client,
+    tags=None,
+    flow_run_name=None,
+    parent_flow_run_id=None,
+    sort="START_TIME_DESC",
+    limit=None,
+    offset=0,
 ):
-    flow_run_filter_parent_flow_run_id = (
-        FlowRunFilterParentFlowRunId(any_=[parent_flow_run_id])
-        if parent_flow_run_id
-        else None
+    flow_runs = await client.read_flow_runs(
+        flow_run_filter=_flow_run_filter(
+            tags,
+            flow_run_name,
+            [parent_flow_run_id] if parent_flow_run_id else None,
+        ),
+        sort=sort,
+        limit=limit,
+        offset=offset,
     )
-    async with get_client() as client:
+    return flow_runs
+
+
+class FlowRunSummary(NamedTuple):
+    """
+    Compact record of a flow run with the fields needed to list and monitor it.
+    Times are kept as the ISO 8601 strings returned by the API.
+    """
+
+    id: str
+    name: str
+    state_type: Optional[StateType]
+    state_name: Optional[str]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    parent_task_run_id: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, flow_run):
+        state_type = flow_run.get("state_type")
+        return cls(
+            flow_run["id"],
+            flow_run["name"],
+            StateType(state_type) if state_type else None,
+            flow_run.get("state_name"),
+            flow_run.get("start_time"),
+            flow_run.get("end_time"),
+            flow_run.get("parent_task_run_id"),
+        )
+
+    @classmethod
+    def from_flow_run(cls, flow_run):
+        return cls(
+            str(flow_run.id),
+            flow_run.name,
+            flow_run.state_type,
+            flow_run.state_name,
+            flow_run.start_time.isoformat() if flow_run.start_time else None,
+            flow_run.end_time.isoformat() if flow_run.end_time else None,
+            str(flow_run.parent_task_run_id) if flow_run.parent_task_run_id else None,
+        )
+
+
+def _http_client(client):
+    # PrefectClient keeps its httpx client in the private _client attribute (Prefect
+    # 2.14, as pinned in pyproject.toml). Returns None if it is missing, so that callers
+    # fall back to the public PrefectClient methods.
+    return getattr(client, "_client", None)
+
+
+@instrument
+async def _flow_run_summary_query(
+    client, flow_run_filter, sort="START_TIME_DESC", limit=None, offset=0
+):
+    http_client = _http_client(client)
+    if http_client is None:
         flow_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=flow_run_name),
-                parent_flow_run_id=flow_run_filter_parent_flow_run_id,
-                tags=FlowRunFilterTags(all_=tags),
-            ),
-            sort=sort,
+            flow_run_filter=flow_run_filter, sort=sort, limit=limit, offset=offset
         )
-        return flow_runs
+        return [FlowRunSummary.from_flow_run(flow_run) for flow_run in flow_runs]
+    # Reads the raw response instead of client.read_flow_runs, which validates full
+    # FlowRun models (parameters, empirical policy, state details, ...)
+    response = await http_client.post(
+        "/flow_runs/filter",
+        json={
+            "flow_runs": flow_run_filter.dict(json_compatible=True, exclude_unset=True),
+            "sort": sort,
+            "limit": limit,
+            "offset": offset,
+        },
+    )
+    return [FlowRunSummary.from_json(flow_run) for flow_run in response.json()]
 
 
-async def _read_flow_run(flow_run_id):
-    async with get_client() as client:
-        flow_run = await client.read_flow_run(flow_run_id)
-        return flow_run
+async def _read_all_flow_run_summaries(
+    client, flow_run_filter, sort="START_TIME_ASC", page_size=200
+):
+    summaries = []
+    while True:
+        page = await _flow_run_summary_query(
+            client, flow_run_filter, sort, limit=page_size, offset=len(summaries)
+        )
+        summaries.extend(page)
+        if len(page) < page_size:
+            return summaries
 
 
-async def _read_flow_run_logs(flow_run_id, limit=200, offset=0):
-    async with get_client() as client:
-        flow_run_logs = await client.read_logs(
-            log_filter=LogFilter(
-                flow_run_id=LogFilterFlowRunId(
-                    any_=[flow_run_id],
-                ),
+@instrument
+async def _read_task_runs_by_id(client, task_run_ids, page_size=200):
+    task_runs = []
+    for i in range(0, len(task_run_ids), page_size):
+        task_runs += await client.read_task_runs(
+            task_run_filter=TaskRunFilter(
+                id=TaskRunFilterId(any_=task_run_ids[i : i + page_size])
             ),
+            limit=page_size,
+        )
+    return task_runs
+
+
+async def _read_children_summaries(client, parent_flow_run_ids, page_size=200):
+    """
+    Returns a dictionary that maps each parent flow run id to the summaries of its
+    children, with one query for the children of all parents and one query for the
+    task runs that link them to their parents
+    """
+    pages = [
+        parent_flow_run_ids[i : i + page_size]
+        for i in range(0, len(parent_flow_run_ids), page_size)
+    ]
+    results = await asyncio.gather(
+        *[
+            _read_all_flow_run_summaries(
+                client, _flow_run_filter(parent_flow_run_ids=page), page_size=page_size
+            )
+            for page in pages
+        ]
+    )
+    children = [summary for summaries in results for summary in summaries]
+    task_run_ids = list({child.parent_task_run_id for child in children})
+    task_runs = await _read_task_runs_by_id(client, task_run_ids, page_size)
+    parent_ids = {str(task_run.id): str(task_run.flow_run_id) for task_run in task_runs}
+    children_by_parent = {}
+    for child in children:
+        parent_id = parent_ids.get(child.parent_task_run_id)
+        children_by_parent.setdefault(parent_id, []).append(child)
+    return children_by_parent
+
+
+async def aget_flow_run_tree(
+    flow_run_id, max_depth=None, page_size=200, timeout=None, client=None
+):
+    """
+    Async version of get_flow_run_tree
+    """
+    async with timeout_context(timeout), client_context(client) as client:
+        roots = await _flow_run_summary_query(
+            client, FlowRunFilter(id=FlowRunFilterId(any_=[str(flow_run_id)]))
+        )
+        if len(roots) == 0:
+            return None
+        tree = {**roots[0]._asdict(), "children": []}
+        level = {tree["id"]: tree}
+        depth = 0
+        while level and (max_depth is None or depth < max_depth):
+            children_by_parent = await _read_children_summaries(
+                client, list(level), page_size
+            )
+            next_level = {}
+            for parent_id, children in children_by_parent.items():
+                if parent_id not in level:
+                    continue
+                for child in children:
+                    node = {**child._asdict(), "children": []}
+                    level[parent_id]["children"].append(node)
+                    next_level[node["id"]] = node
+            level = next_level
+            depth += 1
+    return tree
+
+
+def get_flow_run_tree(flow_run_id, max_depth=None, page_size=200, timeout=None):
+    """
+    Retrieves the flow run and its nested subflow runs as a tree of dictionaries with
+    the FlowRunSummary fields and a list of "children" sorted by start time.
+    The tree is walked breadth-first with batched queries per level, down to
+    max_depth levels of children if given. Returns None if the flow run does not exist.
+    """
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_tree, flow_run_id, max_depth, page_size)
+
+
+async def aquery_flow_run_summaries(
+    flow_run_name=None,
+    tags=None,
+    states=None,
+    limit=None,
+    offset=0,
+    sort="START_TIME_DESC",
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of query_flow_run_summaries
+    """
+    async with timeout_context(timeout), client_context(client) as client:
+        return await _flow_run_summary_query(
+            client,
+            _flow_run_filter(tags, flow_run_name, states=states),
+            sort=sort,
             limit=limit,
             offset=offset,
-            sort=LogSort.TIMESTAMP_ASC,
         )
-        return flow_run_logs
 
 
-def query_flow_runs(flow_run_name=None, tags=None):
-    flow_runs_by_name = []
-    flow_runs = asyncio.run(_flow_run_query(tags, flow_run_name=flow_run_name))
-    for flow_run in flow_runs:
-        if flow_run.state_name in {"Failed", "Crashed"}:
-            flow_name = f"❌ {flow_run.name}"
-        elif flow_run.state_name == "Completed":
-            flow_name = f"✅ {flow_run.name}"
-        elif flow_run.state_name == "Cancelled":
-            flow_name = f"🚫 {flow_run.name}"
-        else:
-            flow_name = f"🕑 {flow_run.name}"
-        flow_runs_by_name.append({"label": flow_name, "value": str(flow_run.id)})
-    return flow_runs_by_name
+def query_flow_run_summaries(
+    flow_run_name=None,
+    tags=None,
+    states=None,
+    limit=None,
+    offset=0,
+    sort="START_TIME_DESC",
+    timeout=None,
+):
+    """
+    Retrieves a FlowRunSummary of each flow run that matches the given name, tags and
+    state types, without building the full FlowRun models.
+    """
+    with deadline(timeout):
+        return client_manager.run(
+            aquery_flow_run_summaries, flow_run_name, tags, states, limit, offset, sort
+        )
+
+
+def _final_cache_key(flow_run_id):
+    return (settings_key(), str(flow_run_id))
+
+
+def _cache_final_flow_run(flow_run):
+    if flow_run.state is not None and flow_run.state.is_final():
+        final_flow_run_cache.set(_final_cache_key(flow_run.id), flow_run)
+
+
+def evict_final_flow_run(flow_run_id):
+    """
+    Drops the flow run and its logs from the cache of flow runs in a final state
+    """
+    final_flow_run_cache.pop(_final_cache_key(flow_run_id))
+    final_logs_cache.pop(_final_cache_key(flow_run_id))
+
+
+@instrument
+async def _read_flow_run_uncached(client, flow_run_id):
+    return await client.read_flow_run(flow_run_id)
+
+
+async def _read_flow_run(client, flow_run_id):
+    """
+    Flow runs in a final state no longer change, so they are kept in
+    final_flow_run_cache until they are evicted by size or deleted
+    """
+    flow_run = final_flow_run_cache.get(_final_cache_key(flow_run_id))
+    if flow_run is None:
+        flow_run = await _read_flow_run_uncached(client, flow_run_id)
+        _cache_final_flow_run(flow_run)
+    return flow_run
+
+
+@instrument
+async def _read_flow_run_logs(
+    client,
+    flow_run_id,
+    limit=200,
+    offset=0,
+    after=None,
+    before=None,
+    sort=LogSort.TIMESTAMP_ASC,
+):
+    timestamp_filter = None
+    if after is not None or before is not None:
+        timestamp_filter = LogFilterTimestamp(after_=after, before_=before)
+    flow_run_logs = await client.read_logs(
+        log_filter=LogFilter(
+            flow_run_id=LogFilterFlowRunId(
+                any_=[flow_run_id],
+            ),
+            timestamp=timestamp_filter,
+        ),
+        limit=limit,
+        offset=offset,
+        sort=sort,
+    )
+    return flow_run_logs
+
+
+def _flow_run_option(flow_run):
+    if flow_run.state_name in {"Failed", "Crashed"}:
+        flow_name = f"❌ {flow_run.name}"
+    elif flow_run.state_name == "Completed":
+        flow_name = f"✅ {flow_run.name}"
+    elif flow_run.state_name == "Cancelled":
+        flow_name = f"🚫 {flow_run.name}"
+    else:
+        flow_name = f"🕑 {flow_run.name}"
+    return {"label": flow_name, "value": str(flow_run.id)}
 
 
-def get_children_flow_run_ids(parent_flow_run_id, sort="START_TIME_ASC"):
-    children_flow_runs = asyncio.run(
-        _flow_run_query(parent_flow_run_id=parent_flow_run_id, sort=sort)
+def flow_run_options(flow_runs):
+    """
+    Returns the dropdown options (label with status icon and id) of the flow runs
+    """
+    return [_flow_run_option(flow_run) for flow_run in flow_runs]
+
+
+def _stale_flow_run_options(flow_run_options, exception):
+    # The last options are only served while Prefect is unavailable
+    if not is_unavailable_error(exception):
+        raise exception
+    return [
+        {**option, "label": f"{option['label']} (stale)"} for option in flow_run_options
+    ]
+
+
+def stale_flow_run_summaries(flow_run_summaries, exception):
+    """
+    Returns the last summaries read, with " (stale)" appended to their names, if the
+    exception means that Prefect is unavailable. Raises the exception otherwise.
+    """
+    if not is_unavailable_error(exception):
+        raise exception
+    return [
+        summary._replace(name=f"{summary.name} (stale)")
+        for summary in flow_run_summaries
+    ]
+
+
+async def aquery_flow_runs(
+    flow_run_name=None,
+    tags=None,
+    limit=None,
+    offset=0,
+    sort="START_TIME_DESC",
+    states=None,
+    timeout=None,
+    client=None,
+):
+    flow_runs = await aquery_flow_run_summaries(
+        flow_run_name, tags, states, limit, offset, sort, timeout, client=client
     )
+    return flow_run_options(flow_runs)
+
+
+def query_flow_runs(
+    flow_run_name=None,
+    tags=None,
+    limit=None,
+    offset=0,
+    sort="START_TIME_DESC",
+    states=None,
+    timeout=None,
+):
+    """
+    Retrieves the dropdown options (label with status icon and id) of the flow runs that
+    match the given name, tags and state types.
+    At most `limit` flow runs are returned, starting at `offset` in `sort` order.
+    If limit is None, the server default limit applies.
+    Results are cached in query_cache for query_cache.ttl seconds, and concurrent
+    identical queries share a single request.
+    While Prefect is unavailable, the last results retained by query_cache are returned
+    with " (stale)" appended to their labels.
+    """
+    key = (
+        settings_key(),
+        flow_run_name,
+        tuple(sorted(tags)) if tags is not None else None,
+        sort,
+        limit,
+        offset,
+        tuple(states) if states is not None else None,
+    )
+    with deadline(timeout):
+        return query_cache.get_or_load(
+            key,
+            lambda: client_manager.run(
+                aquery_flow_runs, flow_run_name, tags, limit, offset, sort, states
+            ),
+            on_stale=_stale_flow_run_options,
+        )
+
+
+async def aiter_flow_runs(
+    flow_run_name=None,
+    tags=None,
+    parent_flow_run_id=None,
+    sort="START_TIME_DESC",
+    page_size=200,
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of iter_flow_runs
+    """
+    async with client_context(client) as client:
+
+        async def _fetch_page(offset):
+            async with timeout_context(timeout):
+                return await _flow_run_query(
+                    client,
+                    tags,
+                    flow_run_name=flow_run_name,
+                    parent_flow_run_id=parent_flow_run_id,
+                    sort=sort,
+                    limit=page_size,
+                    offset=offset,
+                )
+
+        def _fetch(offset):
+            return asyncio.create_task(_fetch_page(offset))
+
+        offset = 0
+        next_page = _fetch(offset)
+        try:
+            while next_page is not None:
+                flow_runs = await next_page
+                offset += len(flow_runs)
+                next_page = _fetch(offset) if len(flow_runs) == page_size else None
+                for flow_run in flow_runs:
+                    yield flow_run
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+
+def iter_flow_runs(
+    flow_run_name=None,
+    tags=None,
+    parent_flow_run_id=None,
+    sort="START_TIME_DESC",
+    page_size=200,
+    timeout=None,
+):
+    """
+    Yields the flow runs that match the given name, tags and parent flow run, in `sort`
+    order. Pages of page_size flow runs are fetched lazily, and the next page is
+    requested while the caller consumes the current one.
+    If given, timeout bounds the request of each page.
+    """
+
+    async def _fetch_page(offset, client):
+        async with timeout_context(timeout):
+            return await _flow_run_query(
+                client,
+                tags,
+                flow_run_name=flow_run_name,
+                parent_flow_run_id=parent_flow_run_id,
+                sort=sort,
+                limit=page_size,
+                offset=offset,
+            )
+
+    def _fetch(offset):
+        return client_manager.submit(_fetch_page, offset)
+
+    offset = 0
+    next_page = _fetch(offset)
+    try:
+        while next_page is not None:
+            flow_runs = next_page.result()
+            offset += len(flow_runs)
+            next_page = _fetch(offset) if len(flow_runs) == page_size else None
+            yield from flow_runs
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
+async def aget_children_flow_run_ids(
+    parent_flow_run_id, sort="START_TIME_ASC", timeout=None, client=None
+):
+    async with timeout_context(timeout), client_context(client) as client:
+        children_flow_runs = await _flow_run_query(
+            client, parent_flow_run_id=parent_flow_run_id, sort=sort
+        )
     children_flow_run_ids = [
         str(children_flow_run.id) for children_flow_run in children_flow_runs
     ]
     return children_flow_run_ids
 
 
-def get_flow_run_logs(flow_run_id):
-    flow_run_logs = asyncio.run(_read_flow_run_logs(flow_run_id))
-    return [log.message for log in flow_run_logs]
+def get_children_flow_run_ids(parent_flow_run_id, sort="START_TIME_ASC", timeout=None):
+    with deadline(timeout):
+        return client_manager.run(aget_children_flow_run_ids, parent_flow_run_id, sort)
+
+
+async def _read_flow_run_logs_tail(client, flow_run_id, limit=200):
+    flow_run_logs = await _read_flow_run_logs(
+        client, flow_run_id, limit=limit, sort=LogSort.TIMESTAMP_DESC
+    )
+    return flow_run_logs[::-1]
+
+
+def _encode_log_cursor(timestamp, skip):
+    return f"{timestamp.isoformat()}|{skip}"
+
+
+def _decode_log_cursor(cursor):
+    timestamp, skip = cursor.rsplit("|", 1)
+    return pendulum.parse(timestamp), int(skip)
+
 
+def _next_log_cursor(flow_run_logs, cursor=None):
+    """
+    The cursor holds the timestamp of the last log read and the number of logs read
+    with that timestamp, which are skipped by the next inclusive timestamp query
+    """
+    if len(flow_run_logs) == 0:
+        return cursor
+    timestamp = flow_run_logs[-1].timestamp
+    skip = sum(1 for log in flow_run_logs if log.timestamp == timestamp)
+    if cursor is not None:
+        cursor_timestamp, cursor_skip = _decode_log_cursor(cursor)
+        if cursor_timestamp == timestamp:
+            skip += cursor_skip
+    return _encode_log_cursor(timestamp, skip)
+
+
+def _previous_log_cursor(flow_run_logs, cursor=None):
+    """
+    Same as _next_log_cursor for logs read backwards: the cursor holds the timestamp of
+    the first log read and the number of logs read with that timestamp
+    """
+    if len(flow_run_logs) == 0:
+        return cursor
+    timestamp = flow_run_logs[0].timestamp
+    skip = sum(1 for log in flow_run_logs if log.timestamp == timestamp)
+    if cursor is not None:
+        cursor_timestamp, cursor_skip = _decode_log_cursor(cursor)
+        if cursor_timestamp == timestamp:
+            skip += cursor_skip
+    return _encode_log_cursor(timestamp, skip)
+
+
+async def _read_flow_run_logs_after(
+    client, flow_run_id, cursor=None, limit=200, tail=False
+):
+    if cursor is None and tail:
+        flow_run_logs = await _read_flow_run_logs_tail(client, flow_run_id, limit)
+    elif cursor is None:
+        flow_run_logs = await _read_flow_run_logs(client, flow_run_id, limit=limit)
+    else:
+        after, skip = _decode_log_cursor(cursor)
+        flow_run_logs = await _read_flow_run_logs(
+            client, flow_run_id, limit=limit, offset=skip, after=after
+        )
+    return flow_run_logs, _next_log_cursor(flow_run_logs, cursor)
+
+
+async def aget_flow_run_logs(
+    flow_run_id, limit=200, tail=False, timeout=None, client=None
+):
+    key = _final_cache_key(flow_run_id)
+    cached_logs = final_logs_cache.get(key, {})
+    if (limit, tail) in cached_logs:
+        return list(cached_logs[(limit, tail)])
+    # The logs of a flow run are only cached if it was known to be final before reading
+    # them, i.e. if it is in final_flow_run_cache
+    is_final = final_flow_run_cache.get(key) is not None
+    async with timeout_context(timeout), client_context(client) as client:
+        if tail:
+            read_logs = _read_flow_run_logs_tail(client, flow_run_id, limit)
+        else:
+            read_logs = _read_flow_run_logs(client, flow_run_id, limit=limit)
+        if is_final:
+            flow_run_logs = await read_logs
+        else:
+            # The flow run is read alongside its logs, which caches it once it is final
+            _, flow_run_logs = await asyncio.gather(
+                _read_flow_run(client, flow_run_id), read_logs
+            )
+    messages = [log.message for log in flow_run_logs]
+    if is_final:
+        final_logs_cache.set(key, {**cached_logs, (limit, tail): messages})
+    return list(messages)
+
+
+def get_flow_run_logs(flow_run_id, limit=200, tail=False, timeout=None):
+    """
+    Retrieves the messages of the first `limit` logs of the flow run,
+    or of the last `limit` logs if tail is True
+    """
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_logs, flow_run_id, limit, tail)
+
+
+async def aget_flow_run_logs_after(
+    flow_run_id, cursor=None, limit=200, tail=False, timeout=None, client=None
+):
+    """
+    Async version of get_flow_run_logs_after
+    """
+    async with timeout_context(timeout), client_context(client) as client:
+        flow_run_logs, cursor = await _read_flow_run_logs_after(
+            client, flow_run_id, cursor, limit, tail
+        )
+    return [log.message for log in flow_run_logs], cursor
+
+
+def get_flow_run_logs_after(
+    flow_run_id, cursor=None, limit=200, tail=False, timeout=None
+):
+    """
+    Retrieves up to `limit` log messages of the flow run that are newer than the cursor,
+    and the cursor to pass to the next call.
+    Without a cursor, the first `limit` logs are returned, or the last `limit` logs if
+    tail is True. The cursor is an opaque string and it is returned unchanged when
+    there are no new logs.
+    """
+    with deadline(timeout):
+        return client_manager.run(
+            aget_flow_run_logs_after, flow_run_id, cursor, limit, tail
+        )
+
+
+async def _read_flow_run_logs_before(client, flow_run_id, cursor=None, limit=200):
+    if cursor is None:
+        flow_run_logs = await _read_flow_run_logs_tail(client, flow_run_id, limit)
+    else:
+        before, skip = _decode_log_cursor(cursor)
+        flow_run_logs = await _read_flow_run_logs(
+            client,
+            flow_run_id,
+            limit=limit,
+            offset=skip,
+            before=before,
+            sort=LogSort.TIMESTAMP_DESC,
+        )
+        flow_run_logs = flow_run_logs[::-1]
+    # A short page means that the first logs were read
+    if len(flow_run_logs) < limit:
+        return flow_run_logs, None
+    return flow_run_logs, _previous_log_cursor(flow_run_logs, cursor)
+
+
+async def aget_flow_run_logs_before(
+    flow_run_id, cursor=None, limit=200, timeout=None, client=None
+):
+    """
+    Async version of get_flow_run_logs_before
+    """
+    async with timeout_context(timeout), client_context(client) as client:
+        flow_run_logs, cursor = await _read_flow_run_logs_before(
+            client, flow_run_id, cursor, limit
+        )
+    return [log.message for log in flow_run_logs], cursor
+
+
+def get_flow_run_logs_before(flow_run_id, cursor=None, limit=200, timeout=None):
+    """
+    Retrieves up to `limit` log messages of the flow run that are older than the cursor,
+    in chronological order, and the cursor to pass to the next call to page backwards.
+    Without a cursor, the last `limit` logs are returned. The returned cursor is None
+    once the first logs of the flow run were read.
+    """
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_logs_before, flow_run_id, cursor, limit)
+
+
+async def _follow_flow_run_log_pages(
+    client, flow_run_id, page_size, poll_interval, max_poll_interval, backoff, timeout
+):
+    cursor = None
+    interval = poll_interval
+    while True:
+        # The state is read before the logs, so once it is final the logs read
+        # afterwards include the last ones
+        async with timeout_context(timeout):
+            flow_run_state = await _get_flow_run_state(client, flow_run_id)
+        new_logs = False
+        while True:
+            async with timeout_context(timeout):
+                flow_run_logs, cursor = await _read_flow_run_logs_after(
+                    client, flow_run_id, cursor, page_size
+                )
+            if flow_run_logs:
+                new_logs = True
+                yield flow_run_logs
+            if len(flow_run_logs) < page_size:
+                break
+        if flow_run_state.is_final():
+            return
+        interval = (
+            poll_interval if new_logs else min(interval * backoff, max_poll_interval)
+        )
+        await asyncio.sleep(interval)
 
-def get_flow_run_parameters(flow_run_id):
-    flow_run = asyncio.run(_read_flow_run(flow_run_id))
-    return flow_run.parameters
+
+async def afollow_flow_run_logs(
+    flow_run_id,
+    page_size=200,
+    poll_interval=1,
+    max_poll_interval=30,
+    backoff=2,
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of follow_flow_run_logs
+    """
+    async with client_context(client) as client:
+        pages = _follow_flow_run_log_pages(
+            client,
+            flow_run_id,
+            page_size,
+            poll_interval,
+            max_poll_interval,
+            backoff,
+            timeout,
+        )
+        try:
+            async for flow_run_logs in pages:
+                for log in flow_run_logs:
+                    yield log
+        finally:
+            await pages.aclose()
+
+
+def follow_flow_run_logs(
+    flow_run_id,
+    page_size=200,
+    poll_interval=1,
+    max_poll_interval=30,
+    backoff=2,
+    timeout=None,
+):
+    """
+    Yields the log records of the flow run as they arrive, until the flow run reaches a
+    final state and its last logs are read.
+    Logs are polled every poll_interval seconds, and the interval grows by `backoff` up
+    to max_poll_interval while there are no new logs. At most one page of page_size
+    logs is held in memory.
+    If given, timeout bounds each request to Prefect, not the whole stream.
+    """
+
+    async def _open(client):
+        return _follow_flow_run_log_pages(
+            client,
+            flow_run_id,
+            page_size,
+            poll_interval,
+            max_poll_interval,
+            backoff,
+            timeout,
+        )
+
+    async def _next_page(pages, client):
+        return await anext(pages, None)
+
+    async def _close(pages, client):
+        await pages.aclose()
+
+    pages = client_manager.run(_open)
+    try:
+        while True:
+            flow_run_logs = client_manager.run(_next_page, pages)
+            if flow_run_logs is None:
+                return
+            yield from flow_run_logs
+    finally:
+        client_manager.run(_close, pages)
+
+
+async def aget_flow_run_parameters(flow_run_id, timeout=None, client=None):
+    async with timeout_context(timeout), client_context(client) as client:
+        flow_run = await _read_flow_run(client, flow_run_id)
+    # Flow runs in a final state are shared through the cache
+    return copy.deepcopy(flow_run.parameters)
+
+
+def get_flow_run_parameters(flow_run_id, timeout=None):
+    with deadline(timeout):
+        return client_manager.run(aget_flow_run_parameters, flow_run_id)
+
+
+class FlowRunLogPage(NamedTuple):
+    """
+    Messages of a page of logs of a flow run, with the cursor to read the logs after it
+    (see get_flow_run_logs_after) and the cursor to read the logs before it (see
+    get_flow_run_logs_before), which is None if the page starts at the first logs.
+    """
+
+    messages: list
+    cursor: Optional[str]
+    earlier_cursor: Optional[str]
+
+
+async def _read_flow_run_log_page(client, flow_run_id, cursor=None, limit=200):
+    # Without a cursor, the last page of logs is read
+    flow_run_logs, next_cursor = await _read_flow_run_logs_after(
+        client, flow_run_id, cursor, limit, tail=True
+    )
+    earlier_cursor = _previous_log_cursor(flow_run_logs)
+    if cursor is None and len(flow_run_logs) < limit:
+        # A short page of the last logs starts at the first logs
+        earlier_cursor = None
+    return FlowRunLogPage(
+        [log.message for log in flow_run_logs], next_cursor, earlier_cursor
+    )
+
+
+class JobStatus(NamedTuple):
+    """
+    Results of get_job_status. Each field is None if it was not requested, or the
+    raised exception if its read failed.
+    - `flow_run` - The flow run.
+    - `dependent_flow_runs` - The FlowRunSummary of each of its dependent flow runs.
+    - `logs` - A FlowRunLogPage of the logs of the requested flow run.
+    """
+
+    flow_run: object
+    dependent_flow_runs: object
+    logs: object
+
+
+async def aget_job_status(
+    flow_run_id=None,
+    dependent_tags=None,
+    logs_flow_run_id=None,
+    logs_cursor=None,
+    logs_limit=200,
+    match_dependents_by_name=True,
+    timeout=None,
+    client=None,
+):
+    """
+    Async version of get_job_status
+    """
+
+    async def _read_flow_run_if_requested():
+        if flow_run_id is not None:
+            return await _read_flow_run(client, flow_run_id)
+
+    async def _read_dependents():
+        if flow_run_id is not None:
+            return await _flow_run_summary_query(
+                client,
+                _flow_run_filter(_dependent_tags(dependent_tags, flow_run_id)),
+            )
+
+    async def _read_logs():
+        if logs_flow_run_id is not None:
+            return await _read_flow_run_log_page(
+                client, logs_flow_run_id, logs_cursor, logs_limit
+            )
+
+    async with timeout_context(timeout), client_context(client) as client:
+        results = await asyncio.gather(
+            _read_flow_run_if_requested(),
+            _read_dependents(),
+            _read_logs(),
+            return_exceptions=True,
+        )
+        flow_run, dependent_flow_runs = results[:2]
+        if (
+            match_dependents_by_name
+            and dependent_flow_runs == []
+            and not isinstance(flow_run, Exception)
+            and flow_run.state_type == StateType.COMPLETED
+        ):
+            # Dependent flow runs scheduled without depends_on are matched by name
+            try:
+                results[1] = await _flow_run_summary_query(
+                    client, _flow_run_filter(list(dependent_tags or []), flow_run.name)
+                )
+            except Exception as e:
+                results[1] = e
+    raise_if_unavailable(results)
+    return JobStatus(*results)
+
+
+def get_job_status(
+    flow_run_id=None,
+    dependent_tags=None,
+    logs_flow_run_id=None,
+    logs_cursor=None,
+    logs_limit=200,
+    match_dependents_by_name=True,
+    timeout=None,
+):
+    """
+    Reads concurrently what a job manager displays about its jobs:
+    - The flow run with the given id, and the summaries of its dependent flow runs, that
+      have all the dependent_tags and were scheduled with depends_on=flow_run_id. Once
+      the flow run has completed, if it has no such dependent flow runs, the flow runs
+      with all the dependent_tags whose name contains the name of the flow run are
+      returned instead, for dependent flow runs scheduled without depends_on. This name
+      query can be turned off with match_dependents_by_name=False once all dependent
+      flow runs are scheduled with depends_on.
+    - A page of logs_limit logs of logs_flow_run_id newer than logs_cursor, or its last
+      page of logs without a cursor.
+    Returns a JobStatus in which each read that failed holds the raised exception.
+    Raises the error of the reads if they all failed because Prefect is unavailable.
+    """
+    with deadline(timeout):
+        return client_manager.run(
+            aget_job_status,
+            flow_run_id,
+            dependent_tags,
+            logs_flow_run_id,
+            logs_cursor,
+            logs_limit,
+            match_dependents_by_name,
+        )
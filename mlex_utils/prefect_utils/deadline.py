@@ -0,0 +1,73 @@
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+_deadline = contextvars.ContextVar("mlex_prefect_deadline", default=None)
+
+
+class PrefectTimeoutError(TimeoutError):
+    """
+    Raised when a call to Prefect does not complete within its timeout or deadline
+    """
+
+
+@contextmanager
+def deadline(timeout=None):
+    """
+    Sets a budget of timeout seconds shared by all the Prefect calls made within the
+    block, including nested ones, e.g.:
+
+        with deadline(4):
+            if get_flow_run_state(flow_run_id) == "COMPLETED":
+                flow_run_name = get_flow_run_name(flow_run_id)
+
+    Nested deadlines cannot extend the enclosing one. If timeout is None, the enclosing
+    deadline (if any) applies.
+    """
+    current = _deadline.get()
+    if timeout is None:
+        yield current
+        return
+    new = time.monotonic() + timeout
+    if current is not None:
+        new = min(new, current)
+    token = _deadline.set(new)
+    try:
+        yield new
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    """
+    Returns the number of seconds left before the current deadline, or None if there
+    is no deadline. Raises PrefectTimeoutError if it has already passed.
+    """
+    current = _deadline.get()
+    if current is None:
+        return None
+    remaining = current - time.monotonic()
+    if remaining <= 0:
+        raise PrefectTimeoutError("Deadline exceeded before calling Prefect")
+    return remaining
+
+
+@asynccontextmanager
+async def timeout_context(timeout=None):
+    """
+    Async version of deadline. The block is cancelled and PrefectTimeoutError is raised
+    if it does not complete within timeout seconds or before the enclosing deadline.
+    It must not enclose a yield of an async generator.
+    """
+    with deadline(timeout):
+        timeout_scope = asyncio.timeout(remaining_time())
+        try:
+            async with timeout_scope:
+                yield
+        except TimeoutError:
+            if not timeout_scope.expired():
+                raise
+            raise PrefectTimeoutError(
+                "Deadline exceeded while calling Prefect"
+            ) from None
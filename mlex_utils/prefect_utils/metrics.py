@@ -0,0 +1,222 @@
+import bisect
+import contextvars
+import functools
+import math
+import threading
+import time
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Operation of the innermost instrumented coroutine, to attribute response sizes
+_operation = contextvars.ContextVar("mlex_prefect_operation", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for bucket, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            yield bucket, total
+
+
+class _OperationMetrics:
+    def __init__(self, duration_buckets, size_buckets):
+        self.duration = _Histogram(duration_buckets)
+        self.size = _Histogram(size_buckets)
+        self.errors = 0
+
+
+class PrefectMetrics:
+    """
+    Per-operation metrics of the Prefect calls: a latency histogram, an error count and
+    a histogram of the size in bytes of the API responses.
+    Operations are the coroutines of prefect_utils.core decorated with instrument, which
+    are the ones that call the API, so results served from a cache are not counted.
+    Nothing is recorded unless enabled is True, which leaves a single attribute check
+    per call.
+    """
+
+    def __init__(
+        self,
+        enabled=False,
+        duration_buckets=DURATION_BUCKETS,
+        size_buckets=SIZE_BUCKETS,
+    ):
+        self.enabled = enabled
+        self.duration_buckets = tuple(duration_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def _get(self, operation):
+        operation_metrics = self._operations.get(operation)
+        if operation_metrics is None:
+            operation_metrics = self._operations[operation] = _OperationMetrics(
+                self.duration_buckets, self.size_buckets
+            )
+        return operation_metrics
+
+    def observe_call(self, operation, duration, error=False):
+        with self._lock:
+            operation_metrics = self._get(operation)
+            operation_metrics.duration.observe(duration)
+            operation_metrics.errors += error
+
+    def observe_response(self, operation, size):
+        with self._lock:
+            self._get(operation).size.observe(size)
+
+    def snapshot(self):
+        """
+        Returns a dictionary that maps each operation to its call "count", "errors",
+        total "duration" in seconds and total response "bytes"
+        """
+        with self._lock:
+            return {
+                operation: {
+                    "count": operation_metrics.duration.count,
+                    "errors": operation_metrics.errors,
+                    "duration": operation_metrics.duration.sum,
+                    "bytes": operation_metrics.size.sum,
+                }
+                for operation, operation_metrics in self._operations.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def text(self):
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            operations = sorted(self._operations.items())
+            _histogram_lines(
+                lines,
+                "mlex_prefect_call_duration_seconds",
+                "Latency of the Prefect calls by operation.",
+                [(operation, m.duration) for operation, m in operations],
+            )
+            lines.append(
+                "# HELP mlex_prefect_call_errors_total "
+                "Prefect calls that raised an exception by operation."
+            )
+            lines.append("# TYPE mlex_prefect_call_errors_total counter")
+            for operation, operation_metrics in operations:
+                lines.append(
+                    f"mlex_prefect_call_errors_total{_labels(operation)} "
+                    f"{operation_metrics.errors}"
+                )
+            _histogram_lines(
+                lines,
+                "mlex_prefect_response_size_bytes",
+                "Size of the Prefect API responses by operation.",
+                [(operation, m.size) for operation, m in operations if m.size.count],
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _labels(operation, le=None):
+    operation = operation.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    if le is None:
+        return f'{{operation="{operation}"}}'
+    return f'{{operation="{operation}",le="{_format_value(le)}"}}'
+
+
+def _histogram_lines(lines, name, description, histograms):
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} histogram")
+    for operation, histogram in histograms:
+        for bucket, count in histogram.cumulative_counts():
+            lines.append(f"{name}_bucket{_labels(operation, bucket)} {count}")
+        lines.append(f"{name}_sum{_labels(operation)} {_format_value(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(operation)} {histogram.count}")
+
+
+metrics = PrefectMetrics()
+
+
+def instrument(fn):
+    """
+    Records the latency and errors of the decorated coroutine function in metrics,
+    under its name without leading underscores.
+    Responses received while it runs are attributed to it, unless a nested
+    instrumented coroutine is running.
+    """
+    operation = fn.__name__.lstrip("_")
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return await fn(*args, **kwargs)
+        token = _operation.set(operation)
+        start = time.perf_counter()
+        error = False
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            _operation.reset(token)
+            metrics.observe_call(operation, time.perf_counter() - start, error)
+
+    return wrapper
+
+
+async def _observe_response(response):
+    operation = _operation.get()
+    if operation is None or not metrics.enabled:
+        return
+    size = response.headers.get("content-length")
+    if size is not None:
+        metrics.observe_response(operation, int(size))
+
+
+# Event hooks of the httpx clients used to call Prefect, to measure the responses
+HTTPX_EVENT_HOOKS = {"response": [_observe_response]}
+
+
+def metrics_text():
+    """
+    Returns the metrics of the Prefect calls in the Prometheus text exposition format
+    """
+    return metrics.text()
+
+
+def register_metrics_route(server, path="/metrics"):
+    """
+    Serves metrics_text() at path on a Flask server and enables the metrics, e.g.:
+
+        register_metrics_route(app.server)
+
+    for a Dash app.
+    """
+    from flask import Response
+
+    def _metrics_view():
+        return Response(metrics_text(), content_type=CONTENT_TYPE)
+
+    server.add_url_rule(path, "mlex_prefect_metrics", _metrics_view)
+    metrics.enabled = True
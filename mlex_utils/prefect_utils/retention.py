@@ -0,0 +1,98 @@
+import logging
+import threading
+
+from mlex_utils.prefect_utils.core import FINAL_STATE_TYPES, purge_flow_runs
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy:
+    """
+    Periodically deletes the flow runs that are older than max_age.
+    It can run once with run(), or every `interval` seconds in a background thread
+    of the current process (e.g. the Dash app server) with start() and stop().
+    - `max_age` - A timedelta. Flow runs expected to start before now - max_age are deleted.
+    - `tags` - Only flow runs with all of these tags are deleted. Without tags, the policy
+      applies to every flow run of the workspace, and a warning is logged.
+    - `states` - Only flow runs in one of these state types are deleted. Defaults to final states.
+    - `interval` - Seconds between runs of the policy when started.
+    - `dry_run` - If True (default, as in purge_flow_runs), matching flow runs are only
+      counted. Set it to False to delete them.
+    - `max_concurrency` - Maximum number of deletions in flight.
+    - `rate_limit` - Maximum number of deletions per second.
+    """
+
+    def __init__(
+        self,
+        max_age,
+        tags=None,
+        states=FINAL_STATE_TYPES,
+        interval=3600,
+        dry_run=True,
+        max_concurrency=5,
+        rate_limit=20,
+    ):
+        self.max_age = max_age
+        self.tags = tags
+        self.states = states
+        self.interval = interval
+        self.dry_run = dry_run
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.last_report = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        if tags is None and not dry_run:
+            logger.warning(
+                "Retention policy without tags: old flow runs are deleted across the "
+                "whole workspace"
+            )
+
+    def _log_progress(self, report):
+        logger.info(
+            f"Retention policy for tags {self.tags}: {report['matched']} matched, "
+            f"{report['deleted']} deleted, {len(report['failed'])} failed"
+        )
+
+    def run(self):
+        """
+        Applies the policy once and returns the purge report
+        """
+        self.last_report = purge_flow_runs(
+            tags=self.tags,
+            older_than=self.max_age,
+            states=self.states,
+            dry_run=self.dry_run,
+            max_concurrency=self.max_concurrency,
+            rate_limit=self.rate_limit,
+            progress_callback=self._log_progress,
+        )
+        return self.last_report
+
+    def _run_periodically(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run()
+            except Exception as e:
+                logger.warning(f"Failed to apply retention policy: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """
+        Applies the policy now and then every `interval` seconds in a daemon thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_periodically,
+            name="mlex-prefect-retention",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,221 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+
+from mlex_utils.prefect_utils.breaker import (
+    CircuitOpenError,
+    is_unavailable_error,
+    raise_if_unavailable,
+)
+from mlex_utils.prefect_utils.client import client_manager
+from mlex_utils.prefect_utils.core import (
+    aquery_flow_run_summaries,
+    flow_run_options,
+    on_flow_runs_changed,
+    query_flow_run_summaries,
+    stale_flow_run_summaries,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FlowRunWatcher:
+    """
+    Server-side poller shared by all the job managers of the process.
+    Each (tags, flow run name) pair that is queried becomes a subscription, and the
+    subscriptions that are due are refreshed together in a background thread that wakes
+    up once per interval.
+    Queries are served from the last snapshot, so many browser tabs polling the same
+    jobs result in a single Prefect query per poll.
+    Subscribers may give the interval at which they query again (poll_interval). Each
+    subscription is polled at the shortest poll_interval of its subscribers, or once per
+    interval without one, and a subscriber is dropped when it does not query again
+    within twice its poll_interval, or within subscription_ttl seconds without one.
+    While Prefect is unavailable, the last snapshot is served with stale names.
+    Snapshots are dropped when flow runs are created, deleted or change state through
+    prefect_utils.core (see invalidate).
+    The polling thread runs with the Prefect settings of the context it was started in.
+    """
+
+    def __init__(self, interval=5, subscription_ttl=60):
+        self.interval = interval
+        self.subscription_ttl = subscription_ttl
+        # Time of the last query of each subscription, by poll interval of the subscribers
+        self._subscriptions = {}
+        self._polled = {}
+        self._snapshot = {}
+        self._errors = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _key(flow_run_name, tags):
+        return (flow_run_name, tuple(sorted(tags)) if tags is not None else None)
+
+    def _subscribe(self, key, poll_interval):
+        self._subscriptions.setdefault(key, {})[poll_interval] = time.monotonic()
+
+    def subscribe(self, flow_run_name=None, tags=None, poll_interval=None):
+        """
+        Subscribes to the flow runs of (tags, flow_run_name) without querying them, e.g.
+        to update the interval at which the subscriber queries them again
+        """
+        with self._lock:
+            self._subscribe(self._key(flow_run_name, tags), poll_interval)
+
+    def query_flow_run_summaries(
+        self, flow_run_name=None, tags=None, timeout=None, poll_interval=None
+    ):
+        """
+        Same as prefect_utils.core.query_flow_run_summaries, served from the last snapshot.
+        The first query of a subscription is sent to Prefect right away, within timeout
+        seconds if given.
+        poll_interval is the number of seconds until the subscriber queries again.
+        """
+        key = self._key(flow_run_name, tags)
+        with self._lock:
+            self._subscribe(key, poll_interval)
+            flow_runs = self._snapshot.get(key)
+            error = self._errors.get(key)
+            generation = self._generation
+        self.start()
+        if flow_runs is None:
+            flow_runs = query_flow_run_summaries(flow_run_name, tags, timeout=timeout)
+            with self._lock:
+                # The subscriber queries again poll_interval seconds after this response
+                self._subscribe(key, poll_interval)
+                if generation == self._generation:
+                    self._snapshot[key] = flow_runs
+                    self._polled[key] = time.monotonic()
+        elif error is not None:
+            flow_runs = stale_flow_run_summaries(flow_runs, error)
+        return flow_runs
+
+    def query_flow_runs(
+        self, flow_run_name=None, tags=None, timeout=None, poll_interval=None
+    ):
+        """
+        Same as prefect_utils.core.query_flow_runs, served from the last snapshot
+        (see query_flow_run_summaries)
+        """
+        return flow_run_options(
+            self.query_flow_run_summaries(flow_run_name, tags, timeout, poll_interval)
+        )
+
+    def invalidate(self):
+        """
+        Drops the snapshots, so that the next query of each subscription is sent to
+        Prefect right away. Polls in flight when it is called do not update the snapshots.
+        """
+        with self._lock:
+            self._snapshot.clear()
+            self._polled.clear()
+            self._errors.clear()
+            self._generation += 1
+
+    async def _poll(self, keys, client):
+        results = await asyncio.gather(
+            *[
+                aquery_flow_run_summaries(
+                    flow_run_name,
+                    list(tags) if tags is not None else None,
+                    client=client,
+                )
+                for flow_run_name, tags in keys
+            ],
+            return_exceptions=True,
+        )
+        raise_if_unavailable(results)
+        return dict(zip(keys, results))
+
+    def _expired(self, poll_interval, last_query, now):
+        if poll_interval is None:
+            return now - last_query > self.subscription_ttl
+        return now - last_query > 2 * poll_interval
+
+    def poll(self):
+        """
+        Refreshes the snapshot of every active subscription that is due in one pass
+        """
+        now = time.monotonic()
+        keys = []
+        with self._lock:
+            for key, subscribers in list(self._subscriptions.items()):
+                for poll_interval, last_query in list(subscribers.items()):
+                    if self._expired(poll_interval, last_query, now):
+                        del subscribers[poll_interval]
+                if not subscribers:
+                    del self._subscriptions[key]
+                    self._polled.pop(key, None)
+                    self._snapshot.pop(key, None)
+                    self._errors.pop(key, None)
+                    continue
+                poll_interval = min(
+                    self.interval if poll_interval is None else poll_interval
+                    for poll_interval in subscribers
+                )
+                if now - self._polled.get(key, -poll_interval) >= poll_interval:
+                    keys.append(key)
+                    self._polled[key] = now
+            generation = self._generation
+        if not keys:
+            return
+        try:
+            results = client_manager.run(self._poll, keys)
+        except Exception as e:
+            if not is_unavailable_error(e):
+                raise
+            results = {key: e for key in keys}
+        with self._lock:
+            if generation != self._generation:
+                # The flow runs changed while polling, so the results may be outdated
+                return
+            for key, flow_runs in results.items():
+                if isinstance(flow_runs, Exception):
+                    if is_unavailable_error(flow_runs):
+                        self._errors[key] = flow_runs
+                    if not isinstance(flow_runs, CircuitOpenError):
+                        logger.warning(
+                            f"Failed to query flow runs for {key}: {flow_runs}"
+                        )
+                elif key in self._subscriptions:
+                    self._snapshot[key] = flow_runs
+                    self._errors.pop(key, None)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Failed to poll flow runs: {e}")
+
+    def start(self):
+        """
+        Starts the polling thread if it is not running
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            context = contextvars.copy_context()
+            self._thread = threading.Thread(
+                target=context.run,
+                args=(self._run,),
+                name="mlex-prefect-watcher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+flow_run_watcher = FlowRunWatcher()
+on_flow_runs_changed(flow_run_watcher.invalidate)
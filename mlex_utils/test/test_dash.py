@@ -2,16 +2,32 @@ import uuid
 from contextvars import copy_context
 
 import pytest
+from dash import no_update
 from dash._callback_context import context_value
 from dash._utils import AttributeDict
+from prefect.client.schemas.objects import StateType
 
+from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    CHECK_INTERVAL,
+    DEV_JOB_STATE_TYPES,
+    DEV_JOBS,
+    MAX_CHECK_INTERVAL,
+    _check_jobs,
+    _has_earlier_logs,
+    _next_check_interval,
+    _triggered_props,
+    _update_logs,
+)
 from mlex_utils.dash_utils.components_bootstrap.advanced_options import (
     DbcAdvancedOptionsAIO,
 )
+from mlex_utils.dash_utils.components_bootstrap.log_viewer import DbcLogViewerAIO
 from mlex_utils.dash_utils.components_mantime.advanced_options import (
     DmcAdvancedOptionsAIO,
 )
+from mlex_utils.dash_utils.components_mantime.log_viewer import DmcLogViewerAIO
 from mlex_utils.dash_utils.mlex_components import MLExComponents
+from mlex_utils.prefect_utils.core import FlowRunLogPage
 
 model_parameters = [
     {
@@ -191,3 +207,136 @@ def test_toggle_warnings_dbc():
 def test_toggle_warnings_dmc():
     assert not DmcAdvancedOptionsAIO.toggle_warning_cancel_modal(0, 0, 0, True)
     assert DmcAdvancedOptionsAIO.toggle_warning_delete_modal(0, 0, 1, False)
+
+
+def test_check_jobs():
+    def run_check_jobs(prop_ids, hashes=None):
+        context_value.set(
+            AttributeDict(
+                **{"triggered_inputs": [{"prop_id": prop_id} for prop_id in prop_ids]}
+            )
+        )
+        return _check_jobs(
+            ["train"],
+            ["inference"],
+            "uid0003",
+            "",
+            "uid0001",
+            "dev",
+            _triggered_props(),
+            hashes=hashes,
+        )
+
+    ctx = copy_context()
+
+    # The initial call and interval ticks check all the outputs
+    expected_output = (DEV_JOBS, DEV_JOBS, no_update, "Sample logs", CHECK_INTERVAL)
+    assert ctx.run(run_check_jobs, [])[:5] == expected_output
+    output = ctx.run(run_check_jobs, ["check-job.n_intervals"])
+    assert output[:5] == expected_output
+
+    # Outputs that did not change since the last check are not sent again
+    hashes = output[5]
+    assert set(hashes) == {"job", "dependent", "logs"}
+    output = ctx.run(run_check_jobs, ["check-job.n_intervals"], hashes)
+    assert output[:6] == (
+        no_update,
+        no_update,
+        no_update,
+        no_update,
+        CHECK_INTERVAL,
+        no_update,
+    )
+    output = ctx.run(run_check_jobs, ["check-job.n_intervals"], {**hashes, "logs": ""})
+    assert output[3] == "Sample logs" and output[5] == hashes
+
+    # Selecting a train job only checks the inference jobs
+    output = ctx.run(run_check_jobs, ["train-dropdown.value"])
+    assert output[:5] == (no_update, DEV_JOBS, no_update, no_update, no_update)
+
+    # Opening the advanced options only checks the logs
+    output = ctx.run(run_check_jobs, ['{"aio_id":"1"}.opened'])
+    assert output[:5] == (no_update, no_update, no_update, "Sample logs", no_update)
+    # The logs are sent again on opening, since earlier logs may have been prepended
+    output = ctx.run(run_check_jobs, ['{"aio_id":"1"}.opened'], hashes)
+    assert output[3] == "Sample logs" and output[5] == hashes
+
+    # Logs are not checked while the advanced options are closed
+    output = _check_jobs(
+        ["train"], None, None, None, "uid0001", "dev", None, logs_open=False
+    )
+    assert output[:4] == (DEV_JOBS, no_update, no_update, no_update)
+
+    # Job managers without dependent jobs
+    output = _check_jobs(["train"], None, None, None, None, "dev", {"n_intervals"})
+    assert output[:5] == (DEV_JOBS, no_update, no_update, "Sample logs", CHECK_INTERVAL)
+
+
+def test_next_check_interval():
+    final_jobs = [StateType.FAILED, StateType.COMPLETED]
+
+    # Jobs are checked fast while any job is pending or running
+    assert _next_check_interval(None, [final_jobs]) == CHECK_INTERVAL
+    assert _next_check_interval(
+        4 * CHECK_INTERVAL, [final_jobs, DEV_JOB_STATE_TYPES]
+    ) == (CHECK_INTERVAL)
+    assert _next_check_interval(4 * CHECK_INTERVAL, [[StateType.SCHEDULED]]) == (
+        CHECK_INTERVAL
+    )
+    assert _next_check_interval(4 * CHECK_INTERVAL, [[]], active=True) == (
+        CHECK_INTERVAL
+    )
+    assert _next_check_interval(CHECK_INTERVAL, [DEV_JOB_STATE_TYPES]) is no_update
+
+    # Checks back off exponentially while all the jobs are in a final state
+    assert _next_check_interval(CHECK_INTERVAL, [final_jobs, []]) == 2 * CHECK_INTERVAL
+    assert _next_check_interval(MAX_CHECK_INTERVAL - 1, [[]]) == MAX_CHECK_INTERVAL
+    assert _next_check_interval(MAX_CHECK_INTERVAL, [[]]) is no_update
+
+    # The interval is kept if no job list could be checked
+    assert _next_check_interval(CHECK_INTERVAL, [None, None]) is no_update
+
+
+@pytest.mark.parametrize("component_type", ["dbc", "dmc"])
+def test_log_viewer(component_type):
+    LogViewerAIO = DbcLogViewerAIO if component_type == "dbc" else DmcLogViewerAIO
+    log_viewer = LogViewerAIO(max_lines=4, page_size=2)
+    logs_state = log_viewer.children[-1].data
+    assert LogViewerAIO.disable_load_earlier(logs_state)
+
+    def log_page(start, stop, cursor):
+        messages = [f"Log {i}" for i in range(start, stop)]
+        return FlowRunLogPage(messages, cursor, f"before-{start}")
+
+    # The last page of logs replaces the content of the viewer
+    logs, logs_state = _update_logs(
+        log_page(2, 4, "cursor-1"), "uid0001", logs_state, None
+    )
+    assert logs[0].children == "Log 2\nLog 3"
+    assert logs_state["pages"][0][1] == 2 and logs_state["cursor"] == "cursor-1"
+    assert not LogViewerAIO.disable_load_earlier(logs_state)
+
+    # New logs are appended as pages, and the oldest pages are dropped beyond max_lines
+    logs, logs_state = _update_logs(
+        log_page(4, 6, "cursor-2"), "uid0001", logs_state, "cursor-1"
+    )
+    assert len(logs.to_plotly_json()["operations"]) == 1
+    assert [lines for _, lines in logs_state["pages"]] == [2, 2]
+    assert not _has_earlier_logs(logs_state)
+    logs, logs_state = _update_logs(
+        log_page(6, 8, "cursor-3"), "uid0001", logs_state, "cursor-2"
+    )
+    operations = logs.to_plotly_json()["operations"]
+    assert [operation["operation"] for operation in operations] == ["Append", "Delete"]
+    assert [lines for _, lines in logs_state["pages"]] == [2, 2]
+    # Dropped logs have a cursor, but are not loaded again beyond max_lines
+    assert logs_state["pages"][0][0] == "before-4"
+    assert not _has_earlier_logs(logs_state)
+    assert _has_earlier_logs({**logs_state, "max_lines": 6})
+
+    # Reads without new logs do not change the viewer
+    empty_page = FlowRunLogPage([], "cursor-3", None)
+    assert _update_logs(empty_page, "uid0001", logs_state, "cursor-3") == (
+        no_update,
+        no_update,
+    )
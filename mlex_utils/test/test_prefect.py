@@ -1,23 +1,90 @@
 import asyncio
+import contextvars
+import threading
+import time
 import uuid
+from datetime import timedelta
+from types import SimpleNamespace
 
+import flask
+import httpx
+import pytest
+from dash import no_update
 from prefect import context, flow, get_client
+from prefect.client.schemas.filters import FlowRunFilter
 from prefect.client.schemas.objects import StateType
 from prefect.deployments import Deployment
 from prefect.engine import create_then_begin_flow_run
+from prefect.exceptions import ObjectNotFound
+from prefect.settings import PREFECT_API_URL, temporary_settings
 from prefect.testing.utilities import prefect_test_harness
 
+from mlex_utils.dash_utils.callbacks.manage_jobs import (
+    CHECK_INTERVAL,
+    _check_jobs,
+    _has_earlier_logs,
+    _load_earlier_logs,
+)
+from mlex_utils.prefect_utils.breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    is_unavailable_error,
+)
+from mlex_utils.prefect_utils.cache import (
+    TTLCache,
+    final_flow_run_cache,
+    final_logs_cache,
+    query_cache,
+)
+from mlex_utils.prefect_utils.client import client_manager
 from mlex_utils.prefect_utils.core import (
+    FIRST_COMPLETED,
+    FIRST_EXCEPTION,
+    FlowRunSummary,
+    _flow_run_summary_query,
+    afollow_flow_run_logs,
+    aget_flow_run_logs,
+    aget_flow_run_name,
+    aget_flow_run_parameters,
+    aget_flow_run_state,
+    await_flow_runs,
     cancel_flow_run,
+    cancel_flow_runs,
     delete_flow_run,
+    dependency_tag,
+    follow_flow_run_logs,
     get_children_flow_run_ids,
+    get_deployment,
     get_flow_run_logs,
+    get_flow_run_logs_after,
+    get_flow_run_logs_before,
     get_flow_run_name,
     get_flow_run_parameters,
     get_flow_run_state,
+    get_flow_run_states,
+    get_flow_run_tree,
+    get_job_status,
+    invalidate_deployment_cache,
+    iter_flow_runs,
+    purge_flow_runs,
+    query_flow_run_summaries,
     query_flow_runs,
     schedule_prefect_flow,
+    schedule_prefect_flows,
+    wait_for_flow_runs,
+)
+from mlex_utils.prefect_utils.deadline import (
+    PrefectTimeoutError,
+    deadline,
+    timeout_context,
 )
+from mlex_utils.prefect_utils.metrics import (
+    metrics,
+    metrics_text,
+    register_metrics_route,
+)
+from mlex_utils.prefect_utils.retention import RetentionPolicy
+from mlex_utils.prefect_utils.watcher import FlowRunWatcher, flow_run_watcher
 
 
 # Note: The name of the flow should avoid the use of "_" in this version of Prefect
@@ -41,6 +108,14 @@ def parent_flow(model_name):
     return parent_flow_run_id
 
 
+@flow(name="Root Flow")
+def root_flow():
+    root_flow_run_id = str(context.get_run_context().flow_run.id)
+    parent_flow("model_1")
+    parent_flow("model_2")
+    return root_flow_run_id
+
+
 async def run_flow():
     async with get_client() as client:
         flow_run_id = await create_then_begin_flow_run(
@@ -74,6 +149,284 @@ def test_schedule_prefect_flows():
         assert isinstance(flow_run_id, uuid.UUID)
 
 
+def test_schedule_multiple_prefect_flows():
+    with prefect_test_harness():
+        deployment = Deployment.build_from_flow(
+            flow=parent_flow,
+            name="test_deployment",
+            version="1",
+            tags=["Test tag"],
+        )
+        # Add deployment
+        deployment.apply()
+
+        # Schedule several parent flows, the last one without a model name
+        flow_run_ids, errors = schedule_prefect_flows(
+            deployment_name="Parent Flow/test_deployment",
+            parameters_list=[{"model_name": f"model_{i}"} for i in range(5)] + [{}],
+            max_concurrency=2,
+        )
+        assert all(
+            isinstance(flow_run_id, uuid.UUID) for flow_run_id in flow_run_ids[:5]
+        )
+        assert errors[:5] == [None] * 5
+        assert flow_run_ids[5] is None and isinstance(errors[5], KeyError)
+
+        # Names are assigned in input order
+        for i, flow_run_id in enumerate(flow_run_ids[:5]):
+            assert get_flow_run_name(flow_run_id).endswith(f"model_{i}")
+
+
+def test_deployment_cache():
+    with prefect_test_harness():
+        invalidate_deployment_cache()
+
+        # Missing deployments are cached too
+        with pytest.raises(AssertionError):
+            get_deployment("Parent Flow/test_deployment")
+
+        deployment = Deployment.build_from_flow(
+            flow=parent_flow,
+            name="test_deployment",
+            version="1",
+            tags=["Test tag"],
+        )
+        deployment.apply()
+        with pytest.raises(AssertionError):
+            get_deployment("Parent Flow/test_deployment")
+
+        # The deployment is found after invalidating the cache
+        invalidate_deployment_cache("Parent Flow/test_deployment")
+        cached_deployment = get_deployment("Parent Flow/test_deployment")
+        assert "model_name" in cached_deployment.parameter_openapi_schema["properties"]
+        assert get_deployment("Parent Flow/test_deployment") is cached_deployment
+
+
+def test_ttl_cache():
+    cache = TTLCache(ttl=60, maxsize=2)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    # Concurrent misses share a single load
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("a", loader)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 5 and len(calls) == 1
+    assert cache.get_or_load("a", loader) == "value"
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "coalesced": 4,
+        "stale": 0,
+        "size": 1,
+    }
+
+    # Least recently used entries are evicted
+    cache.get_or_load("b", lambda: "b")
+    cache.get_or_load("a", loader)
+    cache.get_or_load("c", lambda: "c")
+    assert cache.get_or_load("b", lambda: "new b") == "new b"
+
+    # Clearing the cache forces a new load
+    cache.clear()
+    assert cache.get_or_load("c", lambda: "new c") == "new c"
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+
+    # Errors of the request itself are not counted
+    breaker.record_failure(ValueError("Invalid flow run"))
+    breaker.record_failure(httpx.ConnectError("Connection refused"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Consecutive failures open the breaker, which fails fast
+    breaker.record_failure(httpx.ConnectError("Connection refused"))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # A single probe is allowed once half-open, and its failure opens it again
+    time.sleep(0.3)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure(httpx.ConnectTimeout("Timed out"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # A successful probe closes it
+    time.sleep(0.3)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_probe():
+    async def slow_call(flow_run_id, client):
+        await client.read_flow_run(flow_run_id)
+        await asyncio.sleep(2)
+
+    breaker = client_manager.circuit_breaker
+    recovery_timeout = breaker.recovery_timeout
+    with prefect_test_harness():
+        flow_run_id = asyncio.run(run_flow())
+        try:
+            breaker.recovery_timeout = 0.1
+            for _ in range(breaker.failure_threshold):
+                breaker.record_failure(httpx.ConnectError("Connection refused"))
+            time.sleep(0.2)
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+
+            # A long probe closes the breaker as soon as Prefect answers
+            future = client_manager.submit(slow_call, flow_run_id)
+            for _ in range(50):
+                if breaker.state == CircuitBreaker.CLOSED:
+                    break
+                time.sleep(0.02)
+            assert get_flow_run_state(flow_run_id) == StateType.COMPLETED
+            assert not future.done()
+            future.result()
+        finally:
+            breaker.recovery_timeout = recovery_timeout
+            breaker.reset()
+
+
+def test_stale_flow_runs_while_prefect_is_unavailable():
+    breaker = client_manager.circuit_breaker
+    ttl = query_cache.ttl
+    with prefect_test_harness():
+        flow_run_id = asyncio.run(run_flow())
+        flow_run_name = get_flow_run_name(flow_run_id)
+        try:
+            query_cache.ttl = 0.1
+            flow_runs = query_flow_runs(flow_run_name)
+            time.sleep(0.2)
+
+            # Open the breaker as if Prefect had stopped responding
+            for _ in range(breaker.failure_threshold):
+                breaker.record_failure(httpx.ConnectError("Connection refused"))
+            with pytest.raises(CircuitOpenError):
+                get_flow_run_state(flow_run_id)
+
+            # The last results are served, marked as stale
+            stale_flow_runs = query_flow_runs(flow_run_name)
+            assert [flow_run["value"] for flow_run in stale_flow_runs] == [
+                flow_run["value"] for flow_run in flow_runs
+            ]
+            assert stale_flow_runs[0]["label"] == f"{flow_runs[0]['label']} (stale)"
+        finally:
+            query_cache.ttl = ttl
+            breaker.reset()
+
+        # Calls go through again once the breaker is closed
+        assert get_flow_run_state(flow_run_id) == StateType.COMPLETED
+
+
+def test_deadline():
+    async def slow_call(client):
+        await asyncio.sleep(5)
+
+    async def slow_async_call():
+        async with timeout_context(0.2):
+            await asyncio.sleep(5)
+
+    with prefect_test_harness():
+        flow_run_id = asyncio.run(run_flow())
+        assert get_flow_run_state(flow_run_id, timeout=10) == StateType.COMPLETED
+
+        # Nested deadlines cannot extend the enclosing one
+        with deadline(10) as outer_deadline:
+            with deadline(100) as inner_deadline:
+                assert inner_deadline == outer_deadline
+
+        # Calls in flight are cancelled when the deadline passes
+        start = time.monotonic()
+        with pytest.raises(PrefectTimeoutError):
+            with deadline(0.2):
+                client_manager.run(slow_call)
+        with pytest.raises(PrefectTimeoutError):
+            asyncio.run(slow_async_call())
+        assert time.monotonic() - start < 2
+
+        # Calls made after the deadline fail without reaching Prefect
+        with pytest.raises(PrefectTimeoutError):
+            with deadline(0.1):
+                time.sleep(0.2)
+                get_flow_run_name(flow_run_id)
+        assert get_flow_run_name(flow_run_id) is not None
+
+        # Calls cancelled by their deadline count as failures for the circuit breaker
+        breaker = client_manager.circuit_breaker
+        try:
+            for _ in range(breaker.failure_threshold):
+                with pytest.raises(PrefectTimeoutError):
+                    with deadline(0.1):
+                        client_manager.run(slow_call)
+            assert breaker.state == CircuitBreaker.OPEN
+        finally:
+            breaker.reset()
+
+
+def test_metrics():
+    with prefect_test_harness():
+        flow_run_id = asyncio.run(run_flow())
+
+        # Nothing is recorded while metrics are disabled
+        metrics.reset()
+        get_flow_run_logs(flow_run_id)
+        assert metrics.snapshot() == {}
+
+        server = flask.Flask(__name__)
+        register_metrics_route(server)
+        try:
+            query_flow_run_summaries(tags=["Test tag"])
+            with pytest.raises(ObjectNotFound):
+                get_flow_run_state(str(uuid.uuid4()))
+            snapshot = metrics.snapshot()
+            assert snapshot["flow_run_summary_query"]["count"] == 1
+            assert snapshot["flow_run_summary_query"]["bytes"] > 0
+            assert snapshot["read_flow_run_uncached"]["errors"] == 1
+            # Flow runs served from the cache are not counted as calls
+            get_flow_run_name(flow_run_id)
+            assert metrics.snapshot()["read_flow_run_uncached"]["count"] == 1
+            # Purges are counted per page of matching flow runs
+            purge_flow_runs(older_than=timedelta(0), page_size=2)
+            assert metrics.snapshot()["read_purge_page"]["count"] == 2
+
+            response = server.test_client().get("/metrics")
+            assert response.status_code == 200
+            assert response.content_type.startswith("text/plain")
+            text = response.get_data(as_text=True)
+            assert text == metrics_text()
+            assert (
+                "mlex_prefect_call_duration_seconds_bucket"
+                '{operation="read_flow_run_uncached",le="+Inf"} 1'
+            ) in text
+            assert (
+                'mlex_prefect_call_errors_total{operation="read_flow_run_uncached"} 1'
+            ) in text
+            assert (
+                'mlex_prefect_response_size_bytes_count{operation="flow_run_summary_query"} 1'
+            ) in text
+        finally:
+            metrics.enabled = False
+            metrics.reset()
+
+
 def test_monitor_prefect_flow_runs():
     with prefect_test_harness():
         # Run flow
@@ -84,6 +437,45 @@ def test_monitor_prefect_flow_runs():
         flow_runs = query_flow_runs()
         assert len(flow_runs) == 3
 
+        # Identical queries are served from the cache
+        hits = query_cache.stats()["hits"]
+        assert query_flow_runs() == flow_runs
+        assert query_cache.stats()["hits"] == hits + 1
+
+        # Get flow run summaries filtered by state type
+        summaries = query_flow_run_summaries(states=[StateType.COMPLETED])
+        assert len(summaries) == 3
+        assert all(isinstance(summary, FlowRunSummary) for summary in summaries)
+        assert summaries[0].state_type == StateType.COMPLETED
+        assert summaries[0].end_time is not None
+        assert query_flow_run_summaries(states=[StateType.RUNNING]) == []
+        assert query_flow_runs(states=[StateType.FAILED]) == []
+
+        # Without the private httpx client of PrefectClient, summaries are read through
+        # its public methods
+        async def _query_summaries(public_client):
+            async with get_client() as client:
+                if public_client:
+                    client = SimpleNamespace(read_flow_runs=client.read_flow_runs)
+                return await _flow_run_summary_query(client, FlowRunFilter())
+
+        assert asyncio.run(_query_summaries(True)) == asyncio.run(
+            _query_summaries(False)
+        )
+
+        # Get flow runs in pages
+        flow_runs = query_flow_runs(limit=2, sort="START_TIME_ASC")
+        assert [flow_run["value"] for flow_run in flow_runs][0] == flow_run_id
+        assert len(flow_runs) == 2
+        assert len(query_flow_runs(limit=2, offset=2)) == 1
+
+        # Iterate over flow runs with pages smaller than the number of flow runs
+        flow_run_ids = [str(flow_run.id) for flow_run in iter_flow_runs(page_size=2)]
+        assert len(flow_run_ids) == 3 and flow_run_id in flow_run_ids
+
+        # Stop iterating early
+        assert next(iter_flow_runs(page_size=1)) is not None
+
         # Get flow run name
         flow_run_name = get_flow_run_name(flow_run_id)
         assert isinstance(flow_run_name, str)
@@ -92,6 +484,154 @@ def test_monitor_prefect_flow_runs():
         children_flow_run_ids = get_children_flow_run_ids(flow_run_id)
         assert len(children_flow_run_ids) == 2
 
+        # Get flow run tree
+        flow_run_tree = get_flow_run_tree(flow_run_id)
+        assert flow_run_tree["id"] == flow_run_id
+        assert flow_run_tree["state_type"] == StateType.COMPLETED
+        assert [child["id"] for child in flow_run_tree["children"]] == (
+            children_flow_run_ids
+        )
+        assert all(child["children"] == [] for child in flow_run_tree["children"])
+        assert get_flow_run_tree(flow_run_id, max_depth=0)["children"] == []
+        assert get_flow_run_tree(str(uuid.uuid4())) is None
+
+
+def test_get_flow_run_states():
+    with prefect_test_harness():
+        # Run flow
+        flow_run_id = asyncio.run(run_flow())
+        children_flow_run_ids = get_children_flow_run_ids(flow_run_id)
+
+        # Read all states in pages of 2 ids, including a missing id
+        flow_run_ids = [flow_run_id] + children_flow_run_ids + [str(uuid.uuid4())]
+        flow_run_states = get_flow_run_states(flow_run_ids, page_size=2)
+        assert set(flow_run_states) == set([flow_run_id] + children_flow_run_ids)
+        for flow_run_state in flow_run_states.values():
+            assert flow_run_state["state_type"] == StateType.COMPLETED
+            assert flow_run_state["end_time"] is not None
+
+
+def test_flow_run_watcher():
+    with prefect_test_harness():
+        watcher = FlowRunWatcher(interval=0.1, subscription_ttl=1)
+        try:
+            # The first query of a subscription is sent right away
+            assert watcher.query_flow_runs() == []
+            assert watcher.query_flow_runs(tags=["train"]) == []
+
+            # Run flow and wait for the watcher to refresh its snapshot, which may have
+            # been taken while the flow was running
+            asyncio.run(run_flow())
+            for _ in range(50):
+                summaries = watcher.query_flow_run_summaries()
+                state_types = [flow_run.state_type for flow_run in summaries]
+                if state_types == [StateType.COMPLETED] * 3:
+                    break
+                time.sleep(0.1)
+            assert state_types == [StateType.COMPLETED] * 3
+            flow_runs = watcher.query_flow_runs()
+            assert len(flow_runs) == 3
+            assert watcher.query_flow_runs(tags=["train"]) == []
+
+            # Deleted flow runs are dropped from the shared watcher without waiting to poll
+            flow_run_id = flow_runs[0]["value"]
+            assert flow_run_id in [
+                flow_run["value"] for flow_run in flow_run_watcher.query_flow_runs()
+            ]
+            delete_flow_run(flow_run_id)
+            assert flow_run_id not in [
+                flow_run["value"] for flow_run in flow_run_watcher.query_flow_runs()
+            ]
+
+            # Idle subscriptions are dropped
+            time.sleep(1.5)
+            watcher.poll()
+            assert watcher._subscriptions == {}
+        finally:
+            watcher.stop()
+            flow_run_watcher.stop()
+
+
+def test_flow_run_watcher_backoff():
+    polls = []
+
+    class CountingWatcher(FlowRunWatcher):
+        async def _poll(self, keys, client):
+            polls.extend(keys)
+            return await super()._poll(keys, client)
+
+    def count_polls(poll_interval, duration=2):
+        # Polls while a subscriber queries the jobs every poll_interval seconds
+        polls.clear()
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            watcher.query_flow_runs(tags=["train"], poll_interval=poll_interval)
+            time.sleep(poll_interval)
+        return len(polls)
+
+    with prefect_test_harness():
+        watcher = CountingWatcher(interval=0.05)
+        try:
+            # The first query of a subscription is sent right away
+            assert watcher.query_flow_runs(tags=["train"], poll_interval=0.05) == []
+
+            # Subscriptions are polled at the poll interval of their subscribers, so the
+            # polls back off with the job checks
+            frequent_polls = count_polls(0.05)
+            backed_off_polls = count_polls(0.5)
+            assert backed_off_polls <= 7 < frequent_polls
+
+            # Subscribers that do not query again within twice their interval are dropped
+            time.sleep(1.2)
+            assert watcher._subscriptions == {}
+        finally:
+            watcher.stop()
+
+
+def test_polling_while_prefect_is_unavailable():
+    breaker = client_manager.circuit_breaker
+    # Subscriptions are due on every poll
+    watcher = FlowRunWatcher(interval=0)
+    keys = [(None, None), (None, ("train",))]
+    # Nothing listens on this port, so every query fails to connect
+    with temporary_settings({PREFECT_API_URL: "http://127.0.0.1:9/api"}):
+        try:
+            for flow_run_name, tags in keys:
+                watcher.subscribe(flow_run_name, list(tags) if tags else None)
+
+            # Polls in which every query fails count as failures of the breaker
+            for _ in range(breaker.failure_threshold):
+                watcher.poll()
+            assert breaker.state == CircuitBreaker.OPEN
+            assert all(is_unavailable_error(watcher._errors[key]) for key in keys)
+            breaker.reset()
+
+            # So do job checks in which every read fails
+            flow_run_id = str(uuid.uuid4())
+            for _ in range(breaker.failure_threshold):
+                outputs = _check_jobs(
+                    None, ["inference"], flow_run_id, "", flow_run_id, "prod"
+                )
+                assert outputs[1:4] == (no_update,) * 3
+            assert breaker.state == CircuitBreaker.OPEN
+        finally:
+            breaker.reset()
+
+
+def test_get_nested_flow_run_tree():
+    with prefect_test_harness():
+        root_flow_run_id = root_flow()
+
+        # Each parent flow run holds its own children
+        flow_run_tree = get_flow_run_tree(root_flow_run_id, page_size=1)
+        assert len(flow_run_tree["children"]) == 2
+        for parent in flow_run_tree["children"]:
+            children_flow_run_ids = get_children_flow_run_ids(parent["id"])
+            assert [child["id"] for child in parent["children"]] == (
+                children_flow_run_ids
+            )
+            assert len(children_flow_run_ids) == 2
+
 
 def test_delete_prefect_flow_runs():
     with prefect_test_harness():
@@ -103,14 +643,62 @@ def test_delete_prefect_flow_runs():
         flow_runs = query_flow_runs()
         assert len(flow_runs) == 3
 
+        # Flow runs in a final state are cached, and so are their logs once the flow
+        # run is known to be final
+        final_logs = len(final_logs_cache)
+        get_flow_run_logs(flow_run_id)
+        assert len(final_logs_cache) == final_logs
+        get_flow_run_logs(flow_run_id)
+        final_flow_runs, final_logs = len(final_flow_run_cache), len(final_logs_cache)
+        assert final_flow_runs > 0 and final_logs > 0
+        assert get_flow_run_state(flow_run_id) == StateType.COMPLETED
+        assert len(final_flow_run_cache) == final_flow_runs
+
         # Delete flow run
         delete_flow_run(flow_run_id)
+        assert len(final_flow_run_cache) == final_flow_runs - 1
+        assert len(final_logs_cache) == final_logs - 1
 
         # Get flow runs by name
         flow_runs = query_flow_runs()
         assert len(flow_runs) < 3
 
 
+def test_purge_prefect_flow_runs(caplog):
+    with prefect_test_harness():
+        # Run flow
+        asyncio.run(run_flow())
+
+        # Recent flow runs are not purged
+        report = purge_flow_runs(older_than=timedelta(days=1), dry_run=False)
+        assert report["matched"] == 0
+
+        # Dry runs only count the flow runs
+        report = purge_flow_runs(older_than=timedelta(0), page_size=2)
+        assert report["matched"] == 3 and report["deleted"] == 0
+        assert len(query_flow_runs()) == 3
+        policy = RetentionPolicy(max_age=timedelta(0))
+        assert policy.run()["deleted"] == 0
+        assert policy.last_report["matched"] == 3
+        # Deleting without tags applies to the whole workspace, which is logged
+        assert "without tags" not in caplog.text
+        RetentionPolicy(max_age=timedelta(0), dry_run=False)
+        assert "without tags" in caplog.text
+
+        # Delete all completed flow runs across several pages
+        progress = []
+        report = purge_flow_runs(
+            older_than=timedelta(0),
+            dry_run=False,
+            page_size=2,
+            rate_limit=100,
+            progress_callback=lambda report: progress.append(report["deleted"]),
+        )
+        assert report["matched"] == 3 and report["deleted"] == 3
+        assert progress == [2, 3]
+        assert len(query_flow_runs()) == 0
+
+
 def test_cancel_prefect_flow_runs():
     with prefect_test_harness():
         deployment = Deployment.build_from_flow(
@@ -142,6 +730,100 @@ def test_cancel_prefect_flow_runs():
         assert flow_run_label[0] == "🚫"
 
 
+def test_cancel_multiple_prefect_flow_runs():
+    with prefect_test_harness():
+        deployment = Deployment.build_from_flow(
+            flow=parent_flow,
+            name="test_deployment",
+            version="1",
+            tags=["Test tag"],
+        )
+        deployment.apply()
+
+        # Schedule two flow runs and run a parent flow with two children
+        scheduled_flow_run_ids, _ = schedule_prefect_flows(
+            deployment_name="Parent Flow/test_deployment",
+            parameters_list=[{"model_name": "model_1"}, {"model_name": "model_2"}],
+        )
+        scheduled_flow_run_ids = [
+            str(flow_run_id) for flow_run_id in scheduled_flow_run_ids
+        ]
+        flow_run_id = asyncio.run(run_flow())
+        children_flow_run_ids = get_children_flow_run_ids(flow_run_id)
+
+        # Cancel all of them, including the children of the completed flow run
+        report = cancel_flow_runs(scheduled_flow_run_ids + [flow_run_id])
+        assert sorted(report["cancelled"]) == sorted(scheduled_flow_run_ids)
+        assert sorted(report["skipped"]) == sorted(
+            [flow_run_id] + children_flow_run_ids
+        )
+        assert report["failed"] == {}
+        for flow_run_id in scheduled_flow_run_ids:
+            assert get_flow_run_state(flow_run_id) == StateType.CANCELLED
+
+
+def test_wait_for_flow_runs():
+    with prefect_test_harness():
+        deployment = Deployment.build_from_flow(
+            flow=parent_flow,
+            name="test_deployment",
+            version="1",
+            tags=["Test tag"],
+        )
+        deployment.apply()
+
+        # Schedule two flow runs that are never picked up and run a third one
+        scheduled_flow_run_ids, _ = schedule_prefect_flows(
+            deployment_name="Parent Flow/test_deployment",
+            parameters_list=[{"model_name": "model_1"}, {"model_name": "model_2"}],
+        )
+        scheduled_flow_run_ids = [
+            str(flow_run_id) for flow_run_id in scheduled_flow_run_ids
+        ]
+        flow_run_id = asyncio.run(run_flow())
+
+        # All flow runs cannot complete before the timeout
+        done, pending = wait_for_flow_runs(
+            scheduled_flow_run_ids + [flow_run_id], timeout=0.5, poll_interval=0.1
+        )
+        assert list(done) == [flow_run_id]
+        assert done[flow_run_id]["state_type"] == StateType.COMPLETED
+        assert sorted(pending) == sorted(scheduled_flow_run_ids)
+
+        # The completed flow run is returned right away, also from the async version
+        done, pending = wait_for_flow_runs(
+            scheduled_flow_run_ids + [flow_run_id], return_when=FIRST_COMPLETED
+        )
+        assert list(done) == [flow_run_id]
+        done, pending = asyncio.run(
+            await_flow_runs(
+                scheduled_flow_run_ids + [flow_run_id], return_when=FIRST_COMPLETED
+            )
+        )
+        assert list(done) == [flow_run_id]
+
+        # Cancelling a flow run while waiting ends the wait
+        context = contextvars.copy_context()
+        timer = threading.Timer(
+            0.5, context.run, args=(cancel_flow_run, scheduled_flow_run_ids[0])
+        )
+        timer.start()
+        done, pending = wait_for_flow_runs(
+            scheduled_flow_run_ids,
+            timeout=30,
+            return_when=FIRST_EXCEPTION,
+            poll_interval=0.1,
+        )
+        timer.join()
+        assert list(done) == [scheduled_flow_run_ids[0]]
+        assert done[scheduled_flow_run_ids[0]]["state_type"] == StateType.CANCELLED
+        assert list(pending) == [scheduled_flow_run_ids[1]]
+
+        # Flow runs that do not exist are reported instead of being waited for
+        with pytest.raises(ObjectNotFound):
+            wait_for_flow_runs([flow_run_id, str(uuid.uuid4())], timeout=5)
+
+
 def test_get_flow_run_logs():
     with prefect_test_harness():
         # Run flow
@@ -153,6 +835,235 @@ def test_get_flow_run_logs():
         assert len(flow_run_logs) > 0
         assert isinstance(flow_run_logs[0], str)
 
+        # Get the last logs
+        assert get_flow_run_logs(flow_run_id, limit=2, tail=True) == flow_run_logs[-2:]
+
+        # Read the logs incrementally with a cursor
+        new_logs, cursor = get_flow_run_logs_after(flow_run_id, limit=1)
+        incremental_logs = list(new_logs)
+        while new_logs:
+            new_logs, new_cursor = get_flow_run_logs_after(flow_run_id, cursor, limit=1)
+            incremental_logs += new_logs
+            assert new_cursor == cursor or len(new_logs) > 0
+            cursor = new_cursor
+        assert incremental_logs == flow_run_logs
+
+        # Start from the last logs
+        new_logs, cursor = get_flow_run_logs_after(flow_run_id, limit=1, tail=True)
+        assert new_logs == flow_run_logs[-1:]
+        assert get_flow_run_logs_after(flow_run_id, cursor) == ([], cursor)
+
+        # Page backwards from the last logs
+        earlier_logs, cursor = get_flow_run_logs_before(flow_run_id, limit=1)
+        assert earlier_logs == flow_run_logs[-1:]
+        while cursor is not None:
+            new_logs, cursor = get_flow_run_logs_before(flow_run_id, cursor, limit=1)
+            earlier_logs = new_logs + earlier_logs
+        assert earlier_logs == flow_run_logs
+        assert get_flow_run_logs_before(flow_run_id, limit=len(flow_run_logs) + 1) == (
+            flow_run_logs,
+            None,
+        )
+
+
+def test_follow_flow_run_logs():
+    async def follow_logs(flow_run_id):
+        return [
+            log.message async for log in afollow_flow_run_logs(flow_run_id, page_size=2)
+        ]
+
+    with prefect_test_harness():
+        # Run flow
+        flow_run_id = asyncio.run(run_flow())
+        flow_run_logs = get_flow_run_logs(flow_run_id)
+
+        # The stream stops once the logs of the completed flow run are drained
+        logs = [log.message for log in follow_flow_run_logs(flow_run_id, page_size=2)]
+        assert logs == flow_run_logs
+        assert asyncio.run(follow_logs(flow_run_id)) == flow_run_logs
+
+        # Stop following early
+        logs = follow_flow_run_logs(flow_run_id, page_size=1)
+        assert next(logs).message == flow_run_logs[0]
+        logs.close()
+
+
+def test_check_jobs():
+    def page_lines(page):
+        return page.to_plotly_json()["props"]["children"].split("\n")
+
+    def patch_operations(patch):
+        return [
+            (operation["operation"], operation["location"])
+            for operation in patch.to_plotly_json()["operations"]
+        ]
+
+    with prefect_test_harness():
+        flow_run_id = asyncio.run(run_flow())
+        flow_run_logs = get_flow_run_logs(flow_run_id)
+        try:
+            # Jobs, dependent jobs of a missing job and logs in a single pass
+            outputs = _check_jobs(
+                ["Test tag"],
+                ["inference"],
+                str(uuid.uuid4()),
+                "",
+                flow_run_id,
+                "prod",
+                interval=CHECK_INTERVAL,
+                logs_state={"page_size": 2, "max_lines": 4},
+            )
+            job_options, dependent_options, dependent_value, logs = outputs[:4]
+            interval, logs_state = outputs[4], outputs[6]
+            assert job_options == []
+            assert dependent_options == [] and dependent_value is None
+            # No job is running, so the checks back off, and so do the watcher polls
+            assert interval == 2 * CHECK_INTERVAL
+            subscribers = flow_run_watcher._subscriptions[(None, ("Test tag",))]
+            assert 2 * CHECK_INTERVAL / 1000 in subscribers
+
+            # The log viewer starts from the last page of logs
+            assert len(logs) == 1 and page_lines(logs[0]) == flow_run_logs[-2:]
+            assert logs_state["job_id"] == flow_run_id
+            assert len(logs_state["pages"]) == 1 and logs_state["pages"][0][1] == 2
+            assert _has_earlier_logs(logs_state)
+
+            # Earlier logs are prepended within the maximum number of lines
+            logs, logs_state = _load_earlier_logs(logs_state)
+            assert patch_operations(logs) == [("Prepend", [])]
+            assert logs_state["pages"][1][1] == 2
+            # The flow run has less logs than the maximum number of lines
+            assert sum(lines for _, lines in logs_state["pages"]) == len(flow_run_logs)
+            assert not _has_earlier_logs(logs_state)
+
+            # New logs are appended from the cursor of the last read, and the oldest
+            # pages are dropped beyond the maximum number of lines
+            _, cursor = get_flow_run_logs_after(flow_run_id, limit=1)
+            outputs = _check_jobs(
+                None,
+                None,
+                None,
+                "",
+                flow_run_id,
+                "prod",
+                {"n_intervals"},
+                logs_state={**logs_state, "cursor": cursor},
+            )
+            logs, new_logs_state = outputs[3], outputs[6]
+            assert patch_operations(logs)[0] == ("Append", [])
+            assert all(op == ("Delete", [0]) for op in patch_operations(logs)[1:])
+            new_lines = len(flow_run_logs) - 1
+            assert sum(lines for _, lines in new_logs_state["pages"]) <= max(
+                4, new_lines
+            )
+            assert new_logs_state["pages"][-1][1] == min(2, new_lines)
+
+            # Logs are not read again until there are new ones
+            outputs = _check_jobs(
+                None,
+                None,
+                None,
+                "",
+                flow_run_id,
+                "prod",
+                {"n_intervals"},
+                logs_state=logs_state,
+            )
+            assert outputs[3] is no_update and outputs[6] is no_update
+
+            # Logs are not read while the advanced options are closed
+            outputs = _check_jobs(
+                None, None, None, "", flow_run_id, "prod", None, logs_open=False
+            )
+            assert outputs[3] is no_update
+        finally:
+            flow_run_watcher.stop()
+
+
+def test_dependent_jobs():
+    with prefect_test_harness():
+        deployment = Deployment.build_from_flow(
+            flow=parent_flow,
+            name="test_deployment",
+            version="1",
+            tags=["Test tag"],
+        )
+        deployment.apply()
+        train_flow_run_id = str(asyncio.run(run_flow()))
+
+        # Inference flow runs with and without a dependency on the train flow run
+        inference_flow_run_id = schedule_prefect_flow(
+            deployment_name="Parent Flow/test_deployment",
+            parameters={"model_name": "model_name"},
+            tags=["inference", "project"],
+            depends_on=train_flow_run_id,
+        )
+        schedule_prefect_flow(
+            deployment_name="Parent Flow/test_deployment",
+            parameters={"model_name": "model_name"},
+            tags=["inference", "project"],
+        )
+        assert query_flow_runs(tags=[dependency_tag(train_flow_run_id)]) == [
+            {
+                "label": f"🕑 {get_flow_run_name(inference_flow_run_id)}",
+                "value": str(inference_flow_run_id),
+            }
+        ]
+
+        try:
+            # Only the dependent flow runs of the project are listed
+            dependent_tags = ["inference"]
+            outputs = _check_jobs(
+                None, dependent_tags, train_flow_run_id, "project", None, "prod"
+            )
+            dependent_options, dependent_value = outputs[1:3]
+            assert [option["value"] for option in dependent_options] == [
+                str(inference_flow_run_id)
+            ]
+            assert dependent_value is no_update
+            assert dependent_tags == ["inference"]
+
+            outputs = _check_jobs(
+                None, dependent_tags, train_flow_run_id, "other", None, "prod"
+            )
+            assert outputs[1] == [] and outputs[2] is None
+
+            # Dependent flow runs are not listed until the dependency completes
+            outputs = _check_jobs(
+                None, ["Test tag"], str(inference_flow_run_id), "", None, "prod"
+            )
+            assert outputs[1] == [] and outputs[2] is None
+
+            # Without tagged dependent flow runs, dependent flow runs scheduled without
+            # depends_on are matched by the name of the dependency
+            legacy_train_flow_run_id = str(asyncio.run(run_flow()))
+            legacy_inference_flow_run_id = schedule_prefect_flow(
+                deployment_name="Parent Flow/test_deployment",
+                parameters={"model_name": "model_name"},
+                flow_run_name=f"{get_flow_run_name(legacy_train_flow_run_id)} inference",
+                tags=["inference", "project"],
+            )
+            outputs = _check_jobs(
+                None, dependent_tags, legacy_train_flow_run_id, "project", None, "prod"
+            )
+            assert [option["value"] for option in outputs[1]] == [
+                str(legacy_inference_flow_run_id)
+            ]
+            assert dependent_tags == ["inference"]
+            outputs = _check_jobs(
+                None, dependent_tags, legacy_train_flow_run_id, "other", None, "prod"
+            )
+            assert outputs[1] == [] and outputs[2] is None
+            # The name query can be turned off
+            status = get_job_status(
+                legacy_train_flow_run_id,
+                dependent_tags + ["project"],
+                match_dependents_by_name=False,
+            )
+            assert status.dependent_flow_runs == []
+        finally:
+            flow_run_watcher.stop()
+
 
 def test_get_flow_run_parameters():
     with prefect_test_harness():
@@ -163,3 +1074,43 @@ def test_get_flow_run_parameters():
         # Get flow run logs
         flow_run_parameters = get_flow_run_parameters(flow_run_id)
         assert isinstance(flow_run_parameters, dict)
+
+
+def test_shared_prefect_client():
+    async def _get_client(client):
+        return client
+
+    with prefect_test_harness():
+        # Consecutive calls reuse the same client
+        client = client_manager.run(_get_client)
+        assert client_manager.run(_get_client) is client
+
+    with prefect_test_harness():
+        # A new harness changes the settings and reopens the client
+        new_client = client_manager.run(_get_client)
+        assert new_client is not client
+
+        # The client is reopened after shutdown
+        client_manager.shutdown()
+        assert client_manager.run(_get_client) is not new_client
+
+
+def test_async_api():
+    async def run_queries(flow_run_id):
+        async with get_client() as client:
+            return await asyncio.gather(
+                aget_flow_run_state(flow_run_id, client=client),
+                aget_flow_run_name(flow_run_id, client=client),
+                aget_flow_run_logs(flow_run_id, client=client),
+                aget_flow_run_parameters(flow_run_id, client=client),
+            )
+
+    with prefect_test_harness():
+        flow_run_id = asyncio.run(run_flow())
+
+        # Fan out several requests on one client from a running loop
+        state, name, logs, parameters = asyncio.run(run_queries(flow_run_id))
+        assert state == StateType.COMPLETED
+        assert isinstance(name, str)
+        assert len(logs) > 0
+        assert parameters == {"model_name": "model_name"}